@@ -9,12 +9,29 @@
 #include <cstdlib>
 #include <random>
 #include <chrono>
+#include <iterator>
 
+// Defaults; each can be overridden at build time, e.g. make EXTRA_CFLAGS="-DALPHA=8 -DBETA=16".
+// ALPHA and BETA are only the defaults for --alpha/--beta, and NUM_THREADS only the default for the
+// NUM_THREADS environment variable, so they rarely need a rebuild.
+#ifndef NUM_THREADS
 #define NUM_THREADS 52
+#endif
 
+#ifndef BETA
 #define BETA 32
+#endif
+#ifndef ALPHA
 #define ALPHA 32
-#define BETA_DIV_ALPHA ((int)BETA/(int)ALPHA)
+#endif
+
+// Worker count of a run: the NUM_THREADS environment variable if it is a positive number, else the macro default
+static int threads_from_env(){
+    const char* env = std::getenv("NUM_THREADS");
+    int count = env ? std::atoi(env) : 0;
+    return count > 0 ? count : NUM_THREADS;
+}
+const int num_threads = threads_from_env();
 
 
 typedef struct {
@@ -26,7 +43,13 @@ typedef struct {
     double* mat;
 }thread_args_t;
 
-std::vector<std::stringstream> logstreams(NUM_THREADS);
+// Tile sizes of one run; --alpha/--beta override the macro defaults
+struct tile_params_t {
+    int alpha = ALPHA;
+    int beta = BETA;
+};
+
+std::vector<std::stringstream> logstreams(num_threads);
 
 TaskTable task_table;
 std::vector<double> global_up_array, global_b_array;
@@ -146,7 +169,7 @@ void* thdwork(void* params){
                 pthread_barrier_wait(&barrier);
             }
 
-            int taskid = tid + ctr * NUM_THREADS + (ctr+1);
+            int taskid = tid + ctr * num_threads + (ctr+1);
 
             if (taskid < task_table.rows()){
                 //printf("After T1 barrier: %d %d %d\n", tid, taskid, j);
@@ -160,28 +183,36 @@ void* thdwork(void* params){
     return nullptr;
 }
 
-int main(int argc, char *argv[]){
-    std::cout << "[1]. Inside main." << std::endl;
-
-    if (argc < 2) {
-        std::cerr << "Usage: " << argv[0] << " <filename>" << std::endl;
-        return EXIT_FAILURE;
+// Consumes leading "--alpha N" / "--beta N" pairs from args into params and returns the index of the
+// first remaining argument. Throws on a malformed number.
+size_t parse_tile_options(const std::vector<std::string>& args, tile_params_t& params){
+    size_t pos = 0;
+    while (pos + 1 < args.size() && (args[pos] == "--alpha" || args[pos] == "--beta")){
+        (args[pos] == "--alpha" ? params.alpha : params.beta) = std::stoi(args[pos + 1]);
+        pos += 2;
     }
+    return pos;
+}
 
-    matrix_t<double> data_matrix(argv[1]);
+// Factorizes data_matrix in place with num_threads workers and returns the elapsed time in ms.
+// The task table, Householder arrays and barrier are set up afresh, so it can be called repeatedly.
+double run_qr(matrix_t<double> &data_matrix, const tile_params_t& params){
+    if (params.alpha <= 0 || params.beta < params.alpha) {
+        throw std::invalid_argument("alpha and beta must satisfy 0 < alpha <= beta");
+    }
 
-    int total_task_rows = std::ceil(data_matrix.rows()/BETA);
-    int total_task_cols = std::ceil(data_matrix.rows()/ALPHA);
+    int total_task_rows = std::ceil(data_matrix.rows()/params.beta);
+    int total_task_cols = std::ceil(data_matrix.rows()/params.alpha);
 
-    global_up_array.resize(data_matrix.rows(), 0.0);
-    global_b_array.resize(data_matrix.rows() , 0.0);
+    global_up_array.assign(data_matrix.rows(), 0.0);
+    global_b_array.assign(data_matrix.rows() , 0.0);
 
-    task_table.init(total_task_rows, total_task_cols, ALPHA, BETA, data_matrix);
+    task_table.init(total_task_rows, total_task_cols, params.alpha, params.beta, data_matrix);
 
-    std::vector<pthread_t> threads(NUM_THREADS);
-    std::vector<thread_args_t> thread_args(NUM_THREADS);
+    std::vector<pthread_t> threads(num_threads);
+    std::vector<thread_args_t> thread_args(num_threads);
     
-    for (int i = 0; i < NUM_THREADS; i++){
+    for (int i = 0; i < num_threads; i++){
         thread_args[i].tid = i;
         thread_args[i].total_task_rows = total_task_rows;
         thread_args[i].total_task_cols = total_task_cols;
@@ -190,27 +221,84 @@ int main(int argc, char *argv[]){
         thread_args[i].mat = data_matrix.data_ptr();
     }
 
-    pthread_barrier_init(&barrier, NULL, NUM_THREADS);
+    pthread_barrier_init(&barrier, NULL, num_threads);
 
     auto start = std::chrono::high_resolution_clock::now();
     
-    for (int i = 0; i < NUM_THREADS; i++){
+    for (int i = 0; i < num_threads; i++){
         pthread_create(&threads[i], NULL, thdwork, &thread_args[i]);
     }
 
-    for (int i = 0; i < NUM_THREADS; i++){
+    for (int i = 0; i < num_threads; i++){
         pthread_join(threads[i], NULL);
     }
     
     auto end = std::chrono::high_resolution_clock::now();
 
-    auto elapsed = std::chrono::duration_cast<std::chrono::milliseconds>(end - start).count();
+    pthread_barrier_destroy(&barrier);
 
-    std::cout << "Time taken: " << elapsed << " ms" << std::endl;
+    return std::chrono::duration<double, std::milli>(end - start).count();
+}
 
-    pthread_barrier_destroy(&barrier);
+// --serve: long-lived mode for the experiment scripts. Reads one "[--alpha N] [--beta N] <matrix path>"
+// request per line from stdin and answers each with "Time taken: <ms> ms" or "Error: <message>". Options
+// not given on a line fall back to the server's own. The last matrix read is kept in memory, so repeated
+// runs on the same file skip the parse; every run factorizes a fresh copy of it.
+int serve(const tile_params_t& default_params){
+    std::string line, loaded_path;
+    matrix_t<double> pristine_matrix, data_matrix;
+
+    while (std::getline(std::cin, line)){
+        std::istringstream line_stream(line);
+        std::vector<std::string> args{std::istream_iterator<std::string>(line_stream), std::istream_iterator<std::string>()};
+        if (args.empty()) { continue; }
+        try {
+            tile_params_t params = default_params;
+            size_t pos = parse_tile_options(args, params);
+            if (pos + 1 != args.size()) {
+                throw std::invalid_argument("expected [--alpha N] [--beta N] <matrix path>");
+            }
+            const std::string& path = args[pos];
+            if (path != loaded_path){
+                loaded_path.clear();
+                pristine_matrix.read_matrix(path);
+                loaded_path = path;
+            }
+            data_matrix = pristine_matrix;
+            double elapsed_ms = run_qr(data_matrix, params);
+            std::cout << "Time taken: " << std::fixed << elapsed_ms << " ms" << std::endl;
+        } catch (const std::exception& e) {
+            std::cout << "Error: " << e.what() << std::endl;
+        }
+    }
+
+    return 0;
+}
+
+int main(int argc, char *argv[]){
+    std::vector<std::string> args(argv + 1, argv + argc);
+    tile_params_t params;
+    size_t pos = parse_tile_options(args, params);
+
+    if (pos < args.size() && args[pos] == "--serve") {
+        return serve(params);
+    }
+
+    std::cout << "[1]. Inside main." << std::endl;
+
+    if (pos >= args.size()) {
+        std::cerr << "Usage: " << argv[0] << " [--alpha N] [--beta N] <filename> | --serve" << std::endl;
+        return EXIT_FAILURE;
+    }
+
+    matrix_t<double> data_matrix(args[pos]);
+
+    double elapsed_ms = run_qr(data_matrix, params);
+    auto elapsed = static_cast<long long>(elapsed_ms);
+
+    std::cout << "Time taken: " << elapsed << " ms" << std::endl;
 
     //data_matrix.save("output.txt");
 
     return 0;
-}
\ No newline at end of file
+}
@@ -10,14 +10,34 @@
 #include <csignal>
 #include <cstdlib>
 #include <mutex>
+#include <iterator>
 
+// Defaults; each can be overridden at build time, e.g. make EXTRA_CFLAGS="-DALPHA=8 -DBETA=16".
+// ALPHA and BETA are only the defaults for --alpha/--beta, and NUM_THREADS only the default for the
+// NUM_THREADS environment variable, so they rarely need a rebuild.
+#ifndef NUM_THREADS
 #define NUM_THREADS 28
+#endif
 
+#ifndef BETA
 #define BETA 16
+#endif
+#ifndef ALPHA
 #define ALPHA 4
-#define BETA_DIV_ALPHA ((int)BETA / (int)ALPHA)
+#endif
 
+#ifndef USE_PRIORITY_MAIN_QUEUE
 #define USE_PRIORITY_MAIN_QUEUE 0
+#endif
+
+// Worker count of a run: the NUM_THREADS environment variable if it is a positive number, else the macro default
+static int threads_from_env()
+{
+    const char *env = std::getenv("NUM_THREADS");
+    int count = env ? std::atoi(env) : 0;
+    return count > 0 ? count : NUM_THREADS;
+}
+const int num_threads = threads_from_env();
 typedef struct
 {
     int tid;
@@ -28,7 +48,16 @@ typedef struct
     double *mat;
 } thread_args_ts;
 
-std::vector<std::stringstream> logstreams(NUM_THREADS);
+// Tile sizes of one run; --alpha/--beta override the macro defaults
+struct tile_params_t
+{
+    int alpha = ALPHA;
+    int beta = BETA;
+};
+
+std::vector<std::stringstream> logstreams(num_threads);
+
+int beta_div_alpha = BETA / ALPHA; // Set by run_qr() for the current run's tile sizes
 
 TaskTable task_table;
 DependencyTableAtomic dependency_table;
@@ -217,7 +246,7 @@ void *thdwork(void *params)
                 dependency_table.setDependency(i, j, true);
                 if (new_task->enq_nxt_t1 && (j + 1) <= total_task_cols)
                 {
-                    taskPQ.push(task_table.getTask((j + 1) / BETA_DIV_ALPHA, j + 1));  
+                    taskPQ.push(task_table.getTask((j + 1) / beta_div_alpha, j + 1));  
                 }
             }
         }
@@ -237,7 +266,7 @@ void *thdwork(void *params)
             }
         }
 
-        if (dependency_table.getDependency(total_task_rows - 1, BETA_DIV_ALPHA * (total_task_rows - 1)))
+        if (dependency_table.getDependency(total_task_rows - 1, beta_div_alpha * (total_task_rows - 1)))
         {
             break;
         }
@@ -246,30 +275,41 @@ void *thdwork(void *params)
     return nullptr;
 }
 
-int main(int argc, char *argv[])
+// Consumes leading "--alpha N" / "--beta N" pairs from args into params and returns the index of the
+// first remaining argument. Throws on a malformed number.
+size_t parse_tile_options(const std::vector<std::string> &args, tile_params_t &params)
 {
-    std::cout << "[1]. Inside main." << std::endl;
-
-    if (argc < 2)
+    size_t pos = 0;
+    while (pos + 1 < args.size() && (args[pos] == "--alpha" || args[pos] == "--beta"))
     {
-        std::cerr << "Usage: " << argv[0] << " <filename>" << std::endl;
-        return EXIT_FAILURE;
+        (args[pos] == "--alpha" ? params.alpha : params.beta) = std::stoi(args[pos + 1]);
+        pos += 2;
     }
+    return pos;
+}
 
-    matrix_t<double> data_matrix(argv[1]);
+// Factorizes data_matrix in place with num_threads workers and returns the elapsed time in ms.
+// All shared state (tables, queues, Householder arrays) is reset first, so it can be called repeatedly.
+double run_qr(matrix_t<double> &data_matrix, const tile_params_t &params)
+{
+    if (params.alpha <= 0 || params.beta < params.alpha)
+    {
+        throw std::invalid_argument("alpha and beta must satisfy 0 < alpha <= beta");
+    }
+    beta_div_alpha = params.beta / params.alpha;
 
-    int total_task_rows = std::ceil(data_matrix.rows() / BETA);
-    int total_task_cols = std::ceil(data_matrix.rows() / ALPHA);
+    int total_task_rows = std::ceil(data_matrix.rows() / params.beta);
+    int total_task_cols = std::ceil(data_matrix.rows() / params.alpha);
 
-    global_up_array.resize(data_matrix.rows(), 0.0);
-    global_b_array.resize(data_matrix.rows(), 0.0);
+    global_up_array.assign(data_matrix.rows(), 0.0);
+    global_b_array.assign(data_matrix.rows(), 0.0);
 
     dependency_table.init(total_task_rows, total_task_cols);
-    task_table.init(total_task_rows, total_task_cols, ALPHA, BETA, data_matrix);
+    task_table.init(total_task_rows, total_task_cols, params.alpha, params.beta, data_matrix);
     //task_table.printTaskTable();
 
-    std::vector<pthread_t> threads(NUM_THREADS);
-    std::vector<thread_args_ts> thread_args(NUM_THREADS);
+    std::vector<pthread_t> threads(num_threads);
+    std::vector<thread_args_ts> thread_args(num_threads);
 
     // for(int i = 0 ; i<task_table.rows() ; i++)
     // {
@@ -283,7 +323,7 @@ int main(int argc, char *argv[])
     // std::cout<<flat_graph.size()<<" "<<task_table.rows()<<" "<<task_table.cols()<<std::endl;
     // std::sort(flat_graph.begin(),flat_graph.end(),comparator);
 
-    for (int i = 0; i < NUM_THREADS; i++)
+    for (int i = 0; i < num_threads; i++)
     {
         thread_args[i].tid = i;
         thread_args[i].total_task_rows = total_task_rows;
@@ -297,23 +337,95 @@ int main(int argc, char *argv[])
     //taskpq_insert(taskPQ, task_table.getTask(0, 0), total_task_rows, total_task_cols);
     // for(int i = 0 ; i<flat_graph.size() ; i++)
     // taskPQ.push(flat_graph[i]);
+    taskPQ.clear(); // Workers stop at the last task, so a previous run can leave stale entries behind
+    wait_queue.clear();
     taskPQ.push(task_table.getTask(0, 0));
 
     auto start = std::chrono::high_resolution_clock::now();
 
-    for (int i = 0; i < NUM_THREADS; i++)
+    for (int i = 0; i < num_threads; i++)
     {
         pthread_create(&threads[i], NULL, thdwork, &thread_args[i]);
     }
 
-    for (int i = 0; i < NUM_THREADS; i++)
+    for (int i = 0; i < num_threads; i++)
     {
         pthread_join(threads[i], NULL);
     }
  
     auto end = std::chrono::high_resolution_clock::now();
 
-    auto elapsed = std::chrono::duration_cast<std::chrono::milliseconds>(end - start).count();
+    return std::chrono::duration<double, std::milli>(end - start).count();
+}
+
+// --serve: long-lived mode for the experiment scripts. Reads one "[--alpha N] [--beta N] <matrix path>"
+// request per line from stdin and answers each with "Time taken: <ms> ms" or "Error: <message>". Options
+// not given on a line fall back to the server's own. The last matrix read is kept in memory, so repeated
+// runs on the same file skip the parse; every run factorizes a fresh copy of it.
+int serve(const tile_params_t &default_params)
+{
+    std::string line, loaded_path;
+    matrix_t<double> pristine_matrix, data_matrix;
+
+    while (std::getline(std::cin, line))
+    {
+        std::istringstream line_stream(line);
+        std::vector<std::string> args{std::istream_iterator<std::string>(line_stream), std::istream_iterator<std::string>()};
+        if (args.empty())
+        {
+            continue;
+        }
+        try
+        {
+            tile_params_t params = default_params;
+            size_t pos = parse_tile_options(args, params);
+            if (pos + 1 != args.size())
+            {
+                throw std::invalid_argument("expected [--alpha N] [--beta N] <matrix path>");
+            }
+            const std::string &path = args[pos];
+            if (path != loaded_path)
+            {
+                loaded_path.clear();
+                pristine_matrix.read_matrix(path);
+                loaded_path = path;
+            }
+            data_matrix = pristine_matrix;
+            double elapsed_ms = run_qr(data_matrix, params);
+            std::cout << "Time taken: " << std::fixed << elapsed_ms << " ms" << std::endl;
+        }
+        catch (const std::exception &e)
+        {
+            std::cout << "Error: " << e.what() << std::endl;
+        }
+    }
+
+    return 0;
+}
+
+int main(int argc, char *argv[])
+{
+    std::vector<std::string> args(argv + 1, argv + argc);
+    tile_params_t params;
+    size_t pos = parse_tile_options(args, params);
+
+    if (pos < args.size() && args[pos] == "--serve")
+    {
+        return serve(params);
+    }
+
+    std::cout << "[1]. Inside main." << std::endl;
+
+    if (pos >= args.size())
+    {
+        std::cerr << "Usage: " << argv[0] << " [--alpha N] [--beta N] <filename> | --serve" << std::endl;
+        return EXIT_FAILURE;
+    }
+
+    matrix_t<double> data_matrix(args[pos]);
+
+    double elapsed_ms = run_qr(data_matrix, params);
+    auto elapsed = static_cast<long long>(elapsed_ms);
 
     std::cout << "Time taken: " << elapsed << " ms" << std::endl;
     //dependency_table.printDependencyTable();
@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
-import re
+import argparse
+import multiprocessing
 import subprocess
 import sys
 import numpy as np
+import pandas as pd
 import csv
 import os
-import matplotlib.pyplot as plt # For plotting graphs
-from collections import defaultdict
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from parqr_build import MAIN_SRC_RE, rewrite_file
 
 # ------------------------------------------------------------------------------
 # Script for Experiment 1: Parameter Tuning (Alpha, Beta) for QR Factorization
@@ -19,58 +22,62 @@ FIXED_MATRIX_SIZE_FOR_TUNING = 10800 # As per paper for Fig 2
 FIXED_THREADS_FOR_TUNING = 26       # As per paper for Fig 2
 
 # Range for Alpha and Beta parameters (Paper Fig 2: 2 to 32)
-ALPHA_RANGE = range(2, 33) # 2 to 32 inclusive
-BETA_RANGE = range(2, 33)  # 2 to 32 inclusive
+ALPHA_RANGE = tuple(range(2, 33)) # 2 to 32 inclusive; materialized once since it is iterated per config
+BETA_RANGE = tuple(range(2, 33))  # 2 to 32 inclusive
 
-RUNS_PER_CONFIG = 3  # Number of times to run each (alpha, beta) pair for averaging
+# Each (alpha, beta) pair is run until the mean is stable: stop once the standard error is within
+# TARGET_REL_ERROR of the mean (needs at least 2 runs), or after MAX_RUNS_PER_CONFIG runs
+MAX_RUNS_PER_CONFIG = 5
+TARGET_REL_ERROR = 0.02
+# A config whose first run is slower than this multiple of the best average so far
+# cannot win, so its remaining runs are skipped (overridable with --threshold)
+DEFAULT_PRUNE_THRESHOLD = 2.0
 
 # File and Path Settings (assuming script is in ParQR/scripts/)
 TESTCASE_FOLDER = "../testcase"
-EXECUTABLE_NAME = "../a.out"
+EXECUTABLE_NAME = "a.out" # Built once per priority setting, inside that setting's build dir
 MAKEFILE_NAME = "../Makefile"
+PARQR_ROOT_DIR = ".." # make is always invoked from here
 INTEL_SRC_FILE_NAME = "intel.cpp" # Source file for lock-free queue versions
+SWEEP_BUILD_DIR = "../sweep_builds" # Holds one build dir (objects + a.out) per priority setting
+
+# a.out takes its worker count from NUM_THREADS at run time over the -D default, so every run sets it explicitly
+THREAD_ENV = {**os.environ, "NUM_THREADS": str(FIXED_THREADS_FOR_TUNING)}
+
+# CPUs this script may run on; the sweep workers split them into disjoint slots
+CPUS = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+MAKE_JOBS = len(CPUS) # Bounded `make -jN` instead of an unlimited `make -j`
+# Each worker drives its own resident QR server, pinned to its own FIXED_THREADS_FOR_TUNING
+# CPUs, so several configs can be in flight at once without sharing cores.
+PARALLEL_JOBS = max(1, len(CPUS) // FIXED_THREADS_FOR_TUNING)
+# Configs are dispatched in batches of this size so the early-abort sees an up-to-date best time
+BATCH_SIZE = PARALLEL_JOBS * 2
 # BARRIER_SRC_FILE_NAME = "barrier_main.cpp" # If you also want to tune barrier
 
 # --- Helper Functions (Adapted from previous scripts) ---
 
 def update_makefile_for_source(source_file_name_only):
-    source_path_in_makefile = f"src/{source_file_name_only}"
-    cmd = f"sed -i 's|^MAIN_SRC * =.*|MAIN_SRC = {source_path_in_makefile}|' {MAKEFILE_NAME}"
-    subprocess.run(cmd, shell=True, check=True)
+    source_path_in_makefile = f"{source_file_name_only}" # .cpp mains live in the ParQR root, next to the Makefile
+    rewrite_file(MAKEFILE_NAME, [(MAIN_SRC_RE, f"MAIN_SRC = {source_path_in_makefile}")])
     print(f"[INFO] Makefile updated to use MAIN_SRC = {source_path_in_makefile}")
 
-def get_cpp_source_path(source_file_name_only):
-    return os.path.join("..", source_file_name_only)
-
-def update_threads_in_cpp(cpp_file_path, threads):
-    cmd = f"sed -i 's/^#define[[:space:]]\\+NUM_THREADS[[:space:]]\\+[0-9]\\+/#define NUM_THREADS {threads}/' {cpp_file_path}"
-    subprocess.run(cmd, shell=True, check=True)
-    print(f"[INFO] {os.path.basename(cpp_file_path)}: NUM_THREADS set to {threads}.")
-
-def update_priority_in_cpp(cpp_file_path, priority_flag): # 0 for no priority, 1 for with priority
-    cmd = f"sed -i 's/^#define[[:space:]]\\+USE_PRIORITY_MAIN_QUEUE[[:space:]]\\+[0-9]\\+/#define USE_PRIORITY_MAIN_QUEUE {priority_flag}/' {cpp_file_path}"
-    subprocess.run(cmd, shell=True, check=True)
-    mode = "WITH PRIORITY" if priority_flag == 1 else "WITHOUT PRIORITY"
-    print(f"[INFO] {os.path.basename(cpp_file_path)}: USE_PRIORITY_MAIN_QUEUE set to {priority_flag} ({mode}).")
-
-def update_alpha_beta_in_cpp(cpp_file_path, alpha, beta):
-    cmd_alpha = f"sed -i 's/^#define[[:space:]]\\+ALPHA[[:space:]]\\+[0-9.]\\+/#define ALPHA {alpha}/' {cpp_file_path}"
-    cmd_beta  = f"sed -i 's/^#define[[:space:]]\\+BETA[[:space:]]\\+[0-9.]\\+/#define BETA {beta}/' {cpp_file_path}"
-    subprocess.run(cmd_alpha, shell=True, check=True)
-    subprocess.run(cmd_beta, shell=True, check=True)
-    print(f"[INFO] {os.path.basename(cpp_file_path)}: ALPHA set to {alpha}, BETA set to {beta}.")
-
-def compile_code():
-    print("[INFO] Compiling QR factorization code...")
-    compile_dir = os.path.dirname(MAKEFILE_NAME) # Should be ParQR root
-    subprocess.run("make clean", shell=True, check=True, cwd=compile_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
-    compile_process = subprocess.run("make all", shell=True, cwd=compile_dir, capture_output=True, text=True)
+def compile_code(priority):
+    """Builds the sweep binary for one priority setting and returns its absolute path, or None on failure."""
+    # NUM_THREADS/USE_PRIORITY_MAIN_QUEUE are passed as -D macros; intel.cpp is never edited.
+    # Alpha and Beta are runtime options of the binary, so this is the only build per priority setting.
+    build_dir = os.path.abspath(os.path.join(SWEEP_BUILD_DIR, f"priority_{priority}"))
+    executable = os.path.join(build_dir, EXECUTABLE_NAME)
+    macros = f"-DNUM_THREADS={FIXED_THREADS_FOR_TUNING} -DUSE_PRIORITY_MAIN_QUEUE={priority}"
+    cmd_list = ["make", f"-j{MAKE_JOBS}", "all", f"BUILD_DIR={build_dir}/build", f"TARGET={executable}", f"EXTRA_CFLAGS={macros}"]
+    print(f"[INFO] Compiling QR factorization code into {build_dir} ({macros})...")
+    compile_process = subprocess.run(cmd_list, cwd=PARQR_ROOT_DIR, capture_output=True, text=True)
     if compile_process.returncode != 0:
         print("[ERROR] Compilation failed!")
         print("STDOUT:\n", compile_process.stdout)
         print("STDERR:\n", compile_process.stderr)
-        sys.exit(1)
+        return None
     print("[INFO] Compilation successful.")
+    return executable
 
 def get_matrix_file_path(matrix_dim):
     filename = os.path.join(TESTCASE_FOLDER, f"matrix_{matrix_dim}x{matrix_dim}.txt")
@@ -80,142 +87,238 @@ def get_matrix_file_path(matrix_dim):
         sys.exit(1)
     return filename
 
-def run_qr_executable(matrix_dim, matrix_file_path_abs_or_rel_to_script):
-    # Executable expects matrix path relative to its own location (ParQR root)
-    matrix_file_for_exe = os.path.join(os.path.basename(TESTCASE_FOLDER), os.path.basename(matrix_file_path_abs_or_rel_to_script))
-    cmd_list = [EXECUTABLE_NAME, str(matrix_dim), str(matrix_dim), matrix_file_for_exe]
-
-    print(f"[INFO] Executing: {' '.join(cmd_list)}")
+def report_failed_run(cmd_list, cwd):
+    # Runs are not captured, so re-run a failed one once with capture to show what went wrong
     try:
-        exec_dir = os.path.dirname(EXECUTABLE_NAME) # ParQR root if EXECUTABLE_NAME is ../bin/QR
-        run_output = subprocess.run(cmd_list, capture_output=True, text=True, check=True, cwd=exec_dir, timeout=600) # 10 min timeout
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] Execution failed for {cmd_list} with code {e.returncode}.")
-        print("STDOUT:\n", e.stdout)
-        print("STDERR:\n", e.stderr)
-        return None
+        rerun = subprocess.run(cmd_list, capture_output=True, text=True, cwd=cwd, timeout=600, env=THREAD_ENV)
     except subprocess.TimeoutExpired:
-        print(f"[ERROR] Execution timed out for {cmd_list}.")
+        print("[ERROR] Diagnostic re-run timed out.")
+        return
+    print(f"[ERROR] Diagnostic re-run exited with code {rerun.returncode}.")
+    print("STDOUT:\n", rerun.stdout)
+    print("STDERR:\n", rerun.stderr)
+
+def pin_sweep_worker(cpu_slots):
+    # Each worker takes its own CPU slot, which its QR server inherits
+    cpus = cpu_slots.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+def start_sweep_pool():
+    """Starts a pool of PARALLEL_JOBS workers, each pinned to a disjoint slice of CPUS."""
+    slot_width = len(CPUS) // PARALLEL_JOBS
+    cpu_slots = multiprocessing.Queue()
+    for slot in range(PARALLEL_JOBS):
+        cpu_slots.put(CPUS[slot * slot_width:(slot + 1) * slot_width])
+    return ProcessPoolExecutor(max_workers=PARALLEL_JOBS, initializer=pin_sweep_worker, initargs=(cpu_slots,))
+
+# The resident `a.out --serve` of this worker process, as (executable, Popen). Pool workers live for a
+# whole priority setting, so the server (and the matrix it holds in memory) outlives a single config.
+_qr_server = None
+
+def start_qr_server(executable):
+    # stderr is dropped; a failed request is re-run with capture by report_failed_run()
+    return subprocess.Popen([executable, "--serve"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True, bufsize=1, cwd=os.path.dirname(executable), env=THREAD_ENV)
+
+def stop_qr_server(server):
+    try:
+        server.stdin.close() # EOF on stdin ends the serve loop
+    except BrokenPipeError:
+        pass # Already exited
+    server.wait()
+
+def get_qr_server(executable):
+    """Returns this worker's server for executable, replacing one for another binary or one that died."""
+    global _qr_server
+    if _qr_server is not None and (_qr_server[0] != executable or _qr_server[1].poll() is not None):
+        stop_qr_server(_qr_server[1])
+        _qr_server = None
+    if _qr_server is None:
+        print(f"[INFO] Starting QR server: {executable} --serve")
+        _qr_server = (executable, start_qr_server(executable))
+    return _qr_server[1]
+
+def run_qr_executable(executable, alpha, beta, matrix_file_path):
+    # One request to the resident server; the matrix path is absolute since the server's CWD is its build dir
+    request = ["--alpha", str(alpha), "--beta", str(beta), os.path.abspath(matrix_file_path)]
+    server = get_qr_server(executable)
+    print(f"[INFO] QR server request: {' '.join(request)}")
+    try:
+        server.stdin.write(" ".join(request) + "\n")
+        server.stdin.flush()
+        reply = server.stdout.readline().strip()
+    except BrokenPipeError:
+        reply = ""
+    if not reply.startswith("Time taken:"):
+        print(f"[ERROR] QR server failed on {' '.join(request)}: {reply or f'exited with code {server.poll()}'}")
+        report_failed_run([executable] + request, os.path.dirname(executable))
         return None
 
-    # Extract execution time
-    match = re.search(r"(?:Execution Time|Time taken):\s*([0-9.]+)\s*ms", run_output.stdout)
-    if match:
-        time_ms = float(match.group(1))
-        print(f"[RESULT] Execution time: {time_ms:.2f} ms")
-        return time_ms
-    else:
-        print("[ERROR] Could not parse execution time from output.")
-        print("STDOUT:\n", run_output.stdout)
+    time_ms = float(reply.split()[2])
+    print(f"[RESULT] Execution time: {time_ms:.2f} ms")
+    return time_ms
+
+def evaluate_config(alpha_val, beta_val, priority_setting, executable, matrix_file, best_avg_ms, prune_threshold):
+    """Time one (alpha, beta) point on this priority setting's binary; returns (time in ms, pruned) or None."""
+    priority_str = "with_priority" if priority_setting == 1 else "without_priority"
+    print(f"\n[PROGRESS] ({priority_str}) Alpha={alpha_val}, Beta={beta_val}")
+
+    # --- Condition from original: if alpha == beta and n % alpha == 0 and n % beta == 0 ---
+    # The `alpha == beta` part is too restrictive for a general heatmap.
+    # The `n % alpha == 0` might be a specific requirement of your tiling.
+    # For Fig 2, it's an exhaustive sweep. Let's remove these specific conditions for general tuning.
+    # If your QR *requires* matrix_size % alpha == 0, you should add that check.
+    # if FIXED_MATRIX_SIZE_FOR_TUNING % alpha_val != 0 or FIXED_MATRIX_SIZE_FOR_TUNING % beta_val != 0:
+    #     print(f"[SKIP] Skipping Alpha={alpha_val}, Beta={beta_val} because matrix size {FIXED_MATRIX_SIZE_FOR_TUNING} is not divisible by Alpha or Beta.")
+    #     return None
+
+    run_times_ms = []
+    for run_num in range(1, MAX_RUNS_PER_CONFIG + 1):
+        print(f"[RUN {run_num}/{MAX_RUNS_PER_CONFIG}] Alpha={alpha_val}, Beta={beta_val}, Prio={priority_setting}")
+        exec_time_ms = run_qr_executable(executable, alpha_val, beta_val, matrix_file)
+        if exec_time_ms is not None:
+            run_times_ms.append(exec_time_ms)
+            # Early abort: a first run this far behind the current best cannot average out to a win
+            if run_num == 1 and exec_time_ms > prune_threshold * best_avg_ms:
+                print(f"[PRUNE] Alpha={alpha_val}, Beta={beta_val}: {exec_time_ms:.2f} ms > {prune_threshold}x best ({best_avg_ms:.2f} ms). Skipping remaining runs.")
+                return exec_time_ms, True
+            if len(run_times_ms) >= 2:
+                n = len(run_times_ms)
+                if np.std(run_times_ms, ddof=1) <= TARGET_REL_ERROR * np.mean(run_times_ms) * np.sqrt(n):
+                    print(f"[INFO] Alpha={alpha_val}, Beta={beta_val}: mean stable after {n} runs.")
+                    break
+        else:
+            print(f"[WARN] Run {run_num} failed for Alpha={alpha_val}, Beta={beta_val}. Skipping this run.")
+            # Optionally, break or decide how to handle failed runs for averaging
+
+    if not run_times_ms: # No successful run
+        print(f"[WARN] All runs failed for Alpha={alpha_val}, Beta={beta_val}. No data recorded.")
         return None
 
+    avg_time_ms = np.mean(run_times_ms)
+    print(f"[RESULT] Avg time for Alpha={alpha_val}, Beta={beta_val} ({priority_str}): {avg_time_ms:.2f} ms")
+    return avg_time_ms, False
+
 # --- Main Experiment Logic ---
+def save_heatmap(df_results, priority_str, results_dir):
+    """Plots the Fig. 2 style Alpha x Beta heatmap straight from the in-memory results."""
+    # Imported here, on the main process only, so the sweep workers never pay for matplotlib's startup
+    import matplotlib
+    matplotlib.use("Agg") # Headless backend; must be selected before pyplot is imported
+    import matplotlib.pyplot as plt
+    try:
+        import seaborn as sns
+    except ImportError:
+        print("[WARN] Seaborn not found. Skipping heatmap generation.")
+        return
+    # Alpha on the Y-axis, Beta on the X-axis; configs that were not swept stay blank
+    pivot = df_results.pivot(index="Alpha", columns="Beta", values="AvgTime_ms")
+    plt.figure(figsize=(16, 12))
+    sns.heatmap(pivot, annot=False, cmap="viridis_r")
+    plt.title(f"Avg Execution Time (ms) - {priority_str.replace('_', ' ')}\nMatrix: {FIXED_MATRIX_SIZE_FOR_TUNING}x{FIXED_MATRIX_SIZE_FOR_TUNING}, Threads: {FIXED_THREADS_FOR_TUNING}")
+    plt.xlabel("Beta")
+    plt.ylabel("Alpha")
+    plt.tight_layout()
+    heatmap_path = os.path.join(results_dir, f"heatmap_{priority_str}.png")
+    plt.savefig(heatmap_path, dpi=300)
+    plt.close()
+    print(f"[SUCCESS] Heatmap for {priority_str} saved to: {heatmap_path}")
+
 def main():
+    parser = argparse.ArgumentParser(description="Alpha/Beta parameter tuning sweep (Fig. 2 heatmap data).")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_PRUNE_THRESHOLD,
+                        help="Skip the remaining runs of a config whose first run exceeds THRESHOLD x the best average so far.")
+    args = parser.parse_args()
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
     print(f"[INFO] Changed working directory to: {script_dir}")
     print(f"[INFO] Starting Parameter Tuning Experiment (for Fig. 2 style heatmap data).")
     print(f"[CONFIG] Matrix Size: {FIXED_MATRIX_SIZE_FOR_TUNING}x{FIXED_MATRIX_SIZE_FOR_TUNING}")
     print(f"[CONFIG] Threads: {FIXED_THREADS_FOR_TUNING}")
-    print(f"[CONFIG] Alpha/Beta Range: {ALPHA_RANGE.start}-{ALPHA_RANGE.stop-1}")
-    print(f"[CONFIG] Runs per (Alpha, Beta) pair: {RUNS_PER_CONFIG}")
+    print(f"[CONFIG] Alpha/Beta Range: {ALPHA_RANGE[0]}-{ALPHA_RANGE[-1]}")
+    print(f"[CONFIG] Runs per (Alpha, Beta) pair: 2-{MAX_RUNS_PER_CONFIG}, until the standard error is within {TARGET_REL_ERROR:.0%} of the mean")
+    print(f"[CONFIG] Parallel configs: {PARALLEL_JOBS} ({len(CPUS) // PARALLEL_JOBS} CPU(s) each)")
+    if len(CPUS) // PARALLEL_JOBS < FIXED_THREADS_FOR_TUNING:
+        print(f"[WARN] Only {len(CPUS)} CPU(s) for {FIXED_THREADS_FOR_TUNING} threads; QR runs will be oversubscribed.")
+    print(f"[CONFIG] Early-abort threshold: {args.threshold}x best")
 
     # Prepare matrix file path once
     matrix_file = get_matrix_file_path(FIXED_MATRIX_SIZE_FOR_TUNING)
 
-    # Ensure initial compilation with default settings in intel.cpp
-    # This also sets the NUM_THREADS for the first run.
-    intel_cpp_path = get_cpp_source_path(INTEL_SRC_FILE_NAME)
+    # intel.cpp itself is left untouched: NUM_THREADS and priority are passed as -D macros
+    # (see compile_code) and Alpha/Beta as runtime options of each request.
     update_makefile_for_source(INTEL_SRC_FILE_NAME)
-    update_threads_in_cpp(intel_cpp_path, FIXED_THREADS_FOR_TUNING)
-    # Initial compile will happen before the first parameter update.
 
     # Iterate for "Without Priority" (0) and "With Priority" (1)
     for priority_setting in [0, 1]:
         priority_str = "with_priority" if priority_setting == 1 else "without_priority"
         print(f"\n[PHASE] Running parameter tuning for: {priority_str.upper().replace('_', ' ')}")
         
-        # Update priority setting in intel.cpp
-        update_priority_in_cpp(intel_cpp_path, priority_setting)
-        # No need to recompile here, will happen after alpha/beta update
-
-        results_for_this_priority = []
         output_csv_filename = f"param_tuning_results_{priority_str}_m{FIXED_MATRIX_SIZE_FOR_TUNING}_t{FIXED_THREADS_FOR_TUNING}.csv"
+
+        executable = compile_code(priority_setting)
+        if executable is None:
+            print(f"[WARN] Skipping {priority_str} because compilation failed.")
+            continue
+
+        # Only configs where Beta is a multiple of Alpha are swept (condition from the original script).
+        # This prunes the search space, so the Fig. 2 heatmap will be sparse.
+        configs = [(alpha_val, beta_val) for alpha_val in ALPHA_RANGE for beta_val in BETA_RANGE if beta_val % alpha_val == 0]
+        print(f"[INFO] Dispatching {len(configs)} configs over {PARALLEL_JOBS} parallel job(s).")
+
+        results_dir = "results_param_tuning"
+        os.makedirs(results_dir, exist_ok=True)
+        full_csv_path = os.path.join(results_dir, output_csv_filename)
+
+        # Each config's row is appended and fsync'd as soon as it finishes, so a crash mid-sweep keeps
+        # every result collected so far (and the CSV can be inspected while the sweep runs)
+        k = 0 # Configs that produced a time
+        best_avg_ms = np.inf # Best full (non-pruned) average so far; inf disables pruning until one exists
+        # Leaving the pool closes the workers' QR servers' stdin, so the servers exit with them
+        with open(full_csv_path, "w", newline="") as csv_file, start_sweep_pool() as pool:
+            writer = csv.DictWriter(csv_file, fieldnames=["MatrixSize", "Threads", "Priority", "Alpha", "Beta", "AvgTime_ms", "Pruned"])
+            writer.writeheader()
+            for batch_start in range(0, len(configs), BATCH_SIZE):
+                batch = configs[batch_start:batch_start + BATCH_SIZE]
+                print(f"[INFO] Configs {batch_start + 1}-{batch_start + len(batch)} of {len(configs)}")
+                futures = [pool.submit(evaluate_config, alpha_val, beta_val, priority_setting, executable, matrix_file, best_avg_ms, args.threshold)
+                           for alpha_val, beta_val in batch]
+                batch_results = [future.result() for future in futures]
+                for (alpha_val, beta_val), result in zip(batch, batch_results):
+                    if result is None:
+                        continue
+                    time_ms, was_pruned = result
+                    writer.writerow({"MatrixSize": FIXED_MATRIX_SIZE_FOR_TUNING, "Threads": FIXED_THREADS_FOR_TUNING,
+                                     "Priority": priority_setting, "Alpha": alpha_val, "Beta": beta_val,
+                                     "AvgTime_ms": time_ms, # For pruned configs this is the single (first) run
+                                     "Pruned": was_pruned})
+                    csv_file.flush()
+                    os.fsync(csv_file.fileno())
+                    k += 1
+                    if not was_pruned:
+                        best_avg_ms = min(best_avg_ms, time_ms)
         
-        total_configs = len(ALPHA_RANGE) * len(BETA_RANGE)
-        current_config_num = 0
-
-        for alpha_val in ALPHA_RANGE:
-            for beta_val in BETA_RANGE:
-                current_config_num += 1
-                print(f"\n[PROGRESS] Config {current_config_num}/{total_configs} ({priority_str}) | Alpha={alpha_val}, Beta={beta_val}")
-
-                # --- Condition from original script: if beta % alpha != 0: continue ---
-                # This condition significantly prunes the search space.
-                # For a full heatmap as in Fig 2, you might want to remove this.
-                # If kept, the heatmap will be sparse.
-                # For now, let's keep it to match your original logic, but add a note.
-                if beta_val % alpha_val != 0:
-                    print(f"[SKIP] Skipping Alpha={alpha_val}, Beta={beta_val} because Beta is not a multiple of Alpha.")
-                    continue
-                
-                # --- Condition from original: if alpha == beta and n % alpha == 0 and n % beta == 0 ---
-                # The `alpha == beta` part is too restrictive for a general heatmap.
-                # The `n % alpha == 0` might be a specific requirement of your tiling.
-                # For Fig 2, it's an exhaustive sweep. Let's remove these specific conditions for general tuning.
-                # If your QR *requires* matrix_size % alpha == 0, you should add that check.
-                # if FIXED_MATRIX_SIZE_FOR_TUNING % alpha_val != 0 or FIXED_MATRIX_SIZE_FOR_TUNING % beta_val != 0:
-                #     print(f"[SKIP] Skipping Alpha={alpha_val}, Beta={beta_val} because matrix size {FIXED_MATRIX_SIZE_FOR_TUNING} is not divisible by Alpha or Beta.")
-                #     continue
-
-                update_alpha_beta_in_cpp(intel_cpp_path, alpha_val, beta_val)
-                compile_code() # Recompile because ALPHA/BETA are macros
-
-                run_times_ms = []
-                for run_num in range(1, RUNS_PER_CONFIG + 1):
-                    print(f"[RUN {run_num}/{RUNS_PER_CONFIG}] Alpha={alpha_val}, Beta={beta_val}, Prio={priority_setting}")
-                    exec_time_ms = run_qr_executable(FIXED_MATRIX_SIZE_FOR_TUNING, matrix_file)
-                    if exec_time_ms is not None:
-                        run_times_ms.append(exec_time_ms)
-                    else:
-                        print(f"[WARN] Run {run_num} failed for Alpha={alpha_val}, Beta={beta_val}. Skipping this run.")
-                        # Optionally, break or decide how to handle failed runs for averaging
-                
-                if run_times_ms: # If at least one run was successful
-                    avg_time_ms = np.mean(run_times_ms)
-                    print(f"[RESULT] Avg time for Alpha={alpha_val}, Beta={beta_val} ({priority_str}): {avg_time_ms:.2f} ms")
-                    results_for_this_priority.append({
-                        "MatrixSize": FIXED_MATRIX_SIZE_FOR_TUNING,
-                        "Threads": FIXED_THREADS_FOR_TUNING,
-                        "Priority": priority_setting,
-                        "Alpha": alpha_val,
-                        "Beta": beta_val,
-                        "AvgTime_ms": avg_time_ms
-                    })
-                else:
-                    print(f"[WARN] All runs failed for Alpha={alpha_val}, Beta={beta_val}. No data recorded.")
-        
-        # Save results for the current priority setting
-        if results_for_this_priority:
-            results_dir = "results_param_tuning"
-            os.makedirs(results_dir, exist_ok=True)
-            full_csv_path = os.path.join(results_dir, output_csv_filename)
-            
-            df_results = pd.DataFrame(results_for_this_priority)
-            df_results.to_csv(full_csv_path, index=False)
+        # Summarize the results for the current priority setting from the CSV written above
+        if k:
+            df_results = pd.read_csv(full_csv_path)
             print(f"\n[SUCCESS] Parameter tuning results for {priority_str} saved to: {full_csv_path}")
+            save_heatmap(df_results, priority_str, results_dir)
 
             # Find and print optimal for this priority setting
-            if not df_results.empty:
-                optimal_row = df_results.loc[df_results['AvgTime_ms'].idxmin()]
+            df_complete = df_results[~df_results["Pruned"]]
+            if not df_complete.empty:
+                optimal_row = df_complete.loc[df_complete['AvgTime_ms'].idxmin()]
                 print(f"[OPTIMAL for {priority_str.upper()}]")
                 print(f"  Alpha: {optimal_row['Alpha']}, Beta: {optimal_row['Beta']}")
                 print(f"  Average Time: {optimal_row['AvgTime_ms']:.2f} ms")
         else:
-            print(f"[WARN] No results collected for {priority_str}. CSV not written.")
+            print(f"[WARN] No results collected for {priority_str}. {full_csv_path} only has the header.")
 
+    shutil.rmtree(SWEEP_BUILD_DIR, ignore_errors=True)
     print("\n[INFO] All parameter tuning experiments completed.")
-    print("[INFO] You can now use the generated CSV files to create heatmaps (e.g., using Python's Matplotlib/Seaborn).")
+    print("[INFO] Heatmaps were written next to the CSV files in results_param_tuning/.")
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
-import re
+import glob
 import subprocess
 import sys
 import numpy as np
-import csv
 import os
-import matplotlib.pyplot as plt
+import shutil
+import tempfile
 import pandas as pd
-from collections import defaultdict
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from parqr_build import MAIN_SRC_RE, available_memory_bytes, build_key, cached_binary_path, publish_binary, rewrite_file, worker_tree
 
 # ------------------------------------------------------------------------------
 # Matrix Generation Helper
@@ -28,9 +30,8 @@ def generate_matrix_if_needed(rows, cols, filepath, force_regenerate=False):
         matrix_data = np.random.rand(rows, cols) * 20 - 10 # Values between -10 and 10
 
         try:
-            with open(filepath, 'w') as f:
-                for i in range(rows):
-                    f.write(' '.join(map(lambda x: f"{x:.6f}", matrix_data[i])) + '\n')
+            # Same "%.6f" space-separated text the loaders expect, but formatted in C by numpy
+            np.savetxt(filepath, matrix_data, fmt="%.6f", delimiter=" ")
             print(f"[INFO] Successfully generated and saved matrix to {filepath}")
         except IOError as e:
             print(f"[ERROR] Could not write matrix file {filepath}: {e}")
@@ -38,6 +39,46 @@ def generate_matrix_if_needed(rows, cols, filepath, force_regenerate=False):
     else:
         print(f"[DEBUG] Matrix file {filepath} found. Using existing file.")
 
+def matrix_nbytes(rows, cols):
+    # Size of a float64 .npy matrix file, header included
+    return rows * cols * 8 + 4096
+
+def generate_binary_matrix_if_needed(rows, cols, filepath):
+    """
+    Like generate_matrix_if_needed, but saves the same seeded matrix as a float64 .npy file, which the
+    executable maps instead of parsing. The file is written under a temporary name and renamed into place,
+    so an interrupted write never leaves a truncated matrix behind. Returns False if it could not be written.
+    """
+    if os.path.exists(filepath):
+        print(f"[DEBUG] Matrix file {filepath} found. Using existing file.")
+        return True
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    if shutil.disk_usage(os.path.dirname(filepath)).free < matrix_nbytes(rows, cols):
+        print(f"[WARN] Not enough free space in {os.path.dirname(filepath)} for {filepath}.")
+        return False
+
+    seed_value = rows * 100000 + cols
+    np.random.seed(seed_value)
+    # Scaled and rounded in place (like the "%.6f" text files, so both formats hold the same values):
+    # only the one matrix is ever held, never temporaries of its size
+    matrix_data = np.random.rand(rows, cols)
+    matrix_data *= 20
+    matrix_data -= 10
+    np.round(matrix_data, 6, out=matrix_data)
+
+    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.save(f, matrix_data)
+        os.replace(tmp_path, filepath)
+    except OSError as e:
+        print(f"[WARN] Could not write matrix file {filepath}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    print(f"[INFO] Successfully generated and saved matrix to {filepath}")
+    return True
+
 # ------------------------------------------------------------------------------
 # Global Parameters for Experiment 3 (Scalability Analysis - Fig 4a, 4b)
 # ------------------------------------------------------------------------------
@@ -50,6 +91,11 @@ base_testcase_folder_rel = "../testcase"
 executable_name_rel = "../a.out"        
 makefile_name_rel = "../Makefile"        
 parqr_root_dir_rel = ".."                
+matrix_file_cache = {} # (rows, cols) -> matrix path relative to the ParQR root, filled by pregenerate_matrices()
+build_workers = 3 # Binaries compiled concurrently (one per method), each in a private copy of the tree
+make_jobs = max(1, (os.cpu_count() or 1) // build_workers) # Bounded `make -jN` per build worker, so together they fill the CPUs once
+cores_per_socket = 26 # Runs up to this many threads are pinned to NUMA node 0; larger runs interleave memory
+shm_matrix_dir = "/dev/shm" # tmpfs: binary matrices here stay in RAM for every run and are removed at the end
 # --- Absolute paths will be resolved in main() or relevant functions ---
 
 # Optimal Alpha/Beta from Experiment 4.2 (Parameter Tuning)
@@ -57,33 +103,66 @@ ALPHA_BETA_NO_PRIORITY = {"alpha": 12, "beta": 12}
 ALPHA_BETA_WITH_PRIORITY = {"alpha": 30, "beta": 30}
 ALPHA_BETA_BARRIER = {"alpha": 12, "beta": 12} # VERIFY THIS CHOICE for Barrier
 
+# Methods compared in Fig 4: (label, source file, USE_PRIORITY_MAIN_QUEUE or None, alpha/beta)
+SCALABILITY_METHODS = [
+    ("Without Priority", "intel.cpp", 0, ALPHA_BETA_NO_PRIORITY),
+    ("With Priority", "intel.cpp", 1, ALPHA_BETA_WITH_PRIORITY),
+    ("Barrier", "barrier_main.cpp", None, ALPHA_BETA_BARRIER),
+]
+
 # ------------------------------------------------------------------------------
 # Helper Functions
 # ------------------------------------------------------------------------------
 def update_makefile(abs_makefile_path, source_file_name_only):
     source_path_in_makefile = f"{source_file_name_only}" # Assumes Makefile expects src/file.cpp
-    cmd = f"sed -i 's|^MAIN_SRC * =.*|MAIN_SRC = {source_path_in_makefile}|' {abs_makefile_path}"
-    subprocess.run(cmd, shell=True, check=True)
+    rewrite_file(abs_makefile_path, [(MAIN_SRC_RE, f"MAIN_SRC = {source_path_in_makefile}")])
     print(f"[DEBUG] Updated Makefile ({abs_makefile_path}) to use {source_path_in_makefile}")
 
-def update_cpp_macro(abs_source_file_path, macro_name, macro_value):
-    regex = f"'s/^#define[[:space:]]\\+{macro_name}[[:space:]]\\+[0-9.]\\+/#define {macro_name} {macro_value}/'"
-    cmd = f"sed -i {regex} {abs_source_file_path}"
-    subprocess.run(cmd, shell=True, check=True)
-    print(f"[DEBUG] Updated {abs_source_file_path}: {macro_name}={macro_value}")
+def macros_to_cflags(macros):
+    return " ".join(f"-D{name}={value}" for name, value in macros.items())
 
-def compile_code_cli(abs_parqr_root_dir):
-    print("[DEBUG] Compiling code...")
-    subprocess.run("make clean", shell=True, check=True, cwd=abs_parqr_root_dir)
-    ret = subprocess.run("make -j", shell=True, cwd=abs_parqr_root_dir) # Use make -j for faster compiles
+def compile_code_cli(abs_parqr_root_dir, extra_cflags=""):
+    print(f"[DEBUG] Compiling code... {extra_cflags}")
+    # No `make clean`: the Makefile's flags stamp rebuilds main.o whenever MAIN_SRC/EXTRA_CFLAGS change
+    ret = subprocess.run(["make", f"-j{make_jobs}", f"EXTRA_CFLAGS={extra_cflags}"], cwd=abs_parqr_root_dir)
     if ret.returncode != 0:
         print("[ERROR] Compilation failed.")
         sys.exit(1)
     print("[DEBUG] Compilation succeeded.")
 
-def get_matrix_file_path_for_exe(current_rows, current_cols, abs_parqr_root_dir, rel_testcase_folder_from_root="testcase"):
+def get_cached_binary(abs_parqr_root_dir, abs_makefile_path, source_file_name_only, macros, cache_root_dir=None):
+    """Returns the path of a binary built for (source, macros), compiling it only on a cache miss."""
+    key = build_key(abs_parqr_root_dir, source_file_name_only, macros)
+    # The cache normally lives in the tree being built; build workers point it at the main tree instead
+    cached_binary = cached_binary_path(cache_root_dir or abs_parqr_root_dir, key)
+    if os.path.exists(cached_binary):
+        print(f"[DEBUG] Build cache hit for {source_file_name_only} ({macros_to_cflags(macros)}): {key[:12]}")
+        return cached_binary
+
+    update_makefile(abs_makefile_path, source_file_name_only)
+    compile_code_cli(abs_parqr_root_dir, macros_to_cflags(macros))
+    publish_binary(os.path.join(abs_parqr_root_dir, "a.out"), cached_binary)
+    print(f"[DEBUG] Cached binary for {source_file_name_only} ({macros_to_cflags(macros)}): {key[:12]}")
+    return cached_binary
+
+def shm_matrix_path(rows, cols):
+    return os.path.join(shm_matrix_dir, f"parqr_matrix_{rows}x{cols}.npy")
+
+def get_matrix_file_path_for_exe(current_rows, current_cols, abs_parqr_root_dir, rel_testcase_folder_from_root="testcase", use_shm=True):
+    if (current_rows, current_cols) in matrix_file_cache:
+        return matrix_file_cache[(current_rows, current_cols)]
     # Path to the testcase folder from the ParQR root
     abs_testcase_dir = os.path.join(abs_parqr_root_dir, rel_testcase_folder_from_root)
+
+    # Prefer a binary copy in /dev/shm: every run maps it from RAM instead of re-parsing ASCII
+    binary_name = f"matrix_{current_rows}x{current_cols}.npy"
+    if use_shm and os.path.isdir(shm_matrix_dir) and generate_binary_matrix_if_needed(current_rows, current_cols, shm_matrix_path(current_rows, current_cols)):
+        return shm_matrix_path(current_rows, current_cols)
+    # /dev/shm is too small (Docker's default is 64 MB): keep the binary copy next to the text testcases
+    if generate_binary_matrix_if_needed(current_rows, current_cols, os.path.join(abs_testcase_dir, binary_name)):
+        return os.path.join(rel_testcase_folder_from_root, binary_name)
+
+    # Last resort: the ASCII matrix
     matrix_file_abs_path = os.path.join(abs_testcase_dir, f"matrix_{current_rows}x{current_cols}.txt")
     
     generate_matrix_if_needed(current_rows, current_cols, matrix_file_abs_path)
@@ -95,52 +174,119 @@ def get_matrix_file_path_for_exe(current_rows, current_cols, abs_parqr_root_dir,
     return os.path.join(rel_testcase_folder_from_root, f"matrix_{current_rows}x{current_cols}.txt")
 
 
-def run_executable_cli(abs_parqr_root_dir, current_rows, current_cols, matrix_file_path_for_exe):
-    # Executable is expected to be in abs_parqr_root_dir, named "a.out"
-    executable_in_cwd = "./a.out" 
+def numa_prefix(threads):
+    # Keep a run that fits on one socket on node 0's cores and memory; spread wider runs' pages across all nodes
+    if threads is None or shutil.which("numactl") is None:
+        return []
+    if threads <= cores_per_socket:
+        return ["numactl", "--cpunodebind=0", "--membind=0"]
+    return ["numactl", "--interleave=all"]
+
+def remove_shm_matrices(sizes):
+    # Gives the RAM held by the /dev/shm matrices back, including the .tmp files of a generation cut short
+    for size in sizes:
+        for matrix_path in glob.glob(os.path.join(shm_matrix_dir, f"parqr_matrix_{size}x{size}.npy*")):
+            os.remove(matrix_path)
+
+def pregenerate_matrices(abs_parqr_root_dir, sizes):
+    # Generate (or find) every test matrix once, in parallel, and remember their paths for the run loop.
+    # Which matrices go to /dev/shm is decided here, up front, against its free space minus every matrix already
+    # placed there: workers checking on their own could all pass before any of them has written.
+    shm_free = shutil.disk_usage(shm_matrix_dir).free if os.path.isdir(shm_matrix_dir) else 0
+    use_shm = []
+    for size in sizes:
+        fits = os.path.exists(shm_matrix_path(size, size)) or matrix_nbytes(size, size) <= shm_free
+        if fits and not os.path.exists(shm_matrix_path(size, size)):
+            shm_free -= matrix_nbytes(size, size)
+        use_shm.append(fits)
+    # A worker holds one whole matrix while it generates it, so only as many run as the largest fits into available memory
+    max_workers = max(1, min(len(sizes), os.cpu_count() or 1))
+    available = available_memory_bytes()
+    if available is not None:
+        max_workers = max(1, min(max_workers, available // matrix_nbytes(max(sizes), max(sizes))))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        paths = list(pool.map(get_matrix_file_path_for_exe, sizes, sizes, [abs_parqr_root_dir] * len(sizes),
+                              ["testcase"] * len(sizes), use_shm))
+    for size, path in zip(sizes, paths):
+        matrix_file_cache[(size, size)] = path
 
-    cmd_list = [executable_in_cwd, matrix_file_path_for_exe]
-    print(f"[DEBUG] Running command (from {abs_parqr_root_dir}): {' '.join(cmd_list)}")
+def thread_env(threads):
+    # a.out reads its worker count from NUM_THREADS at run time, so it is always set explicitly: one
+    # inherited from the caller's environment would otherwise run every point at the same count
+    return {**os.environ, "NUM_THREADS": str(threads)}
+
+def start_qr_server(abs_parqr_root_dir, exe_cmd, threads):
+    # One long-lived `a.out [--alpha A --beta B] --serve` per (method, threads): it reads a matrix path per
+    # line on stdin and keeps the parsed matrix in memory, so the cycles of a size re-read nothing from disk
+    cmd_list = numa_prefix(threads) + exe_cmd + ["--serve"]
+    print(f"[DEBUG] Starting QR server (from {abs_parqr_root_dir}): NUM_THREADS={threads} {' '.join(cmd_list)}")
+    # Only the reply lines are read; stderr is dropped and recovered by report_failed_run() if a run fails
+    return subprocess.Popen(cmd_list, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            text=True, bufsize=1, cwd=abs_parqr_root_dir, env=thread_env(threads))
+
+def stop_qr_server(server):
     try:
-        result = subprocess.run(cmd_list, capture_output=True, text=True, check=True, cwd=abs_parqr_root_dir)
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] Error running executable. Return code: {e.returncode}")
-        print(f"  Stdout: {e.stdout.strip()}")
-        print(f"  Stderr: {e.stderr.strip()}")
-        return None
-    except FileNotFoundError as e:
-        print(f"[ERROR] FileNotFoundError when trying to run executable: {e}")
-        print(f"  Attempted to run: {' '.join(cmd_list)}")
-        print(f"  From CWD: {abs_parqr_root_dir}")
-        abs_exe_path_check = os.path.join(abs_parqr_root_dir, executable_in_cwd.lstrip('./'))
-        print(f"  Does '{abs_exe_path_check}' exist? {os.path.exists(abs_exe_path_check)}")
-        return None
-
-    match = re.search(r"(?:Execution Time|Time taken):\s*([0-9.]+)\s*ms", result.stdout)
-    if match:
-        return float(match.group(1))
-    else:
-        print("[ERROR] Time not found in executable output."); print("--- STDOUT ---"); print(result.stdout.strip()); print("--- STDERR ---"); print(result.stderr.strip())
-        return None
+        server.stdin.close() # EOF on stdin ends the serve loop
+    except BrokenPipeError:
+        pass # Already exited
+    server.wait()
 
-def run_scalability_experiment(abs_parqr_root_dir, abs_makefile_path, source_file_name_only, 
-                               current_matrix_size, thread_count, priority_val, alpha_val, beta_val):
-    # Path to the specific C++ source file (e.g., intel.cpp, barrier_main.cpp)
-    abs_source_file_path = os.path.join(abs_parqr_root_dir, source_file_name_only)
+def report_failed_run(abs_parqr_root_dir, exe_cmd, threads, matrix_file_path_for_exe):
+    # Re-run a failed request once as a plain captured run to show what went wrong
+    cmd_list = exe_cmd + [matrix_file_path_for_exe]
+    rerun = subprocess.run(cmd_list, capture_output=True, text=True, cwd=abs_parqr_root_dir, env=thread_env(threads))
+    print(f"[ERROR] Diagnostic re-run of {' '.join(cmd_list)} exited with code {rerun.returncode}.")
+    print(f"  Stdout: {rerun.stdout.strip()}")
+    print(f"  Stderr: {rerun.stderr.strip()}")
 
-    update_makefile(abs_makefile_path, source_file_name_only)
-    update_cpp_macro(abs_source_file_path, "NUM_THREADS", thread_count)
+def run_on_qr_server(server, matrix_file_path_for_exe):
+    print(f"[DEBUG] QR server request: {matrix_file_path_for_exe}")
+    try:
+        server.stdin.write(matrix_file_path_for_exe + "\n")
+        server.stdin.flush()
+        reply = server.stdout.readline().strip()
+    except BrokenPipeError:
+        reply = ""
+    if reply.startswith("Time taken:"):
+        return float(reply.split()[2])
+    print(f"[ERROR] QR server failed on {matrix_file_path_for_exe}: {reply or f'exited with code {server.poll()}'}")
+    return None
+
+def prepare_binary(abs_parqr_root_dir, abs_makefile_path, source_file_name_only, priority_val, cache_root_dir=None):
+    # Macros are passed as -D flags; the sources themselves are never edited.
+    # Alpha/Beta (--alpha/--beta) and the thread count (NUM_THREADS) are set at run time, so they are not part of the build.
+    macros = {}
     if priority_val is not None: # For intel.cpp
-        update_cpp_macro(abs_source_file_path, "USE_PRIORITY_MAIN_QUEUE", priority_val)
-    update_cpp_macro(abs_source_file_path, "ALPHA", alpha_val)
-    update_cpp_macro(abs_source_file_path, "BETA", beta_val)
+        macros["USE_PRIORITY_MAIN_QUEUE"] = priority_val
+    return get_cached_binary(abs_parqr_root_dir, abs_makefile_path, source_file_name_only, macros, cache_root_dir)
 
-    compile_code_cli(abs_parqr_root_dir)
-    
+def prepare_binary_in_worker_tree(abs_parqr_root_dir, build_trees_dir, source_file_name_only, priority_val):
+    # Build-pool job: compiles in this worker's own copy of the ParQR tree and publishes the binary into
+    # the main tree's build cache
+    worker_root = worker_tree(abs_parqr_root_dir, build_trees_dir)
+    return prepare_binary(worker_root, os.path.join(worker_root, "Makefile"), source_file_name_only, priority_val,
+                          cache_root_dir=abs_parqr_root_dir)
+
+def prepare_all_binaries(abs_parqr_root_dir):
+    """Builds the binary of every method in parallel; returns their paths in SCALABILITY_METHODS order."""
+    max_workers = max(1, min(build_workers, len(SCALABILITY_METHODS)))
+    print(f"[INFO] Building {len(SCALABILITY_METHODS)} binaries with {max_workers} parallel build worker(s) before any timed run...")
+    build_trees_dir = tempfile.mkdtemp(prefix="parqr_build_trees_")
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(prepare_binary_in_worker_tree, abs_parqr_root_dir, build_trees_dir, source_name, priority_val)
+                       for _, source_name, priority_val, _ in SCALABILITY_METHODS]
+            return [future.result() for future in futures] # Re-raises a failed build's SystemExit here
+    finally:
+        shutil.rmtree(build_trees_dir, ignore_errors=True)
+
+def run_scalability_experiment(abs_parqr_root_dir, exe_cmd, threads, server, current_matrix_size):
     # Get matrix path relative to project root, as expected by executable
     matrix_file_for_exe = get_matrix_file_path_for_exe(current_matrix_size, current_matrix_size, abs_parqr_root_dir)
     
-    exec_time = run_executable_cli(abs_parqr_root_dir, current_matrix_size, current_matrix_size, matrix_file_for_exe)
+    exec_time = run_on_qr_server(server, matrix_file_for_exe)
+    if exec_time is None:
+        report_failed_run(abs_parqr_root_dir, exe_cmd, threads, matrix_file_for_exe)
     return exec_time
 
 # ------------------------------------------------------------------------------
@@ -153,7 +299,6 @@ def main():
 
     abs_parqr_root_dir = os.path.abspath(parqr_root_dir_rel)
     abs_executable_path = os.path.join(abs_parqr_root_dir, executable_name_rel.lstrip("../").lstrip("./"))
-    abs_makefile_path = os.path.join(abs_parqr_root_dir, makefile_name_rel.lstrip("../").lstrip("./"))
     # --- End of path resolution ---
 
     if not os.path.exists(abs_executable_path):
@@ -168,51 +313,76 @@ def main():
         print(f"[INFO] Executable found at {abs_executable_path}.")
 
 
-    all_run_data = []
-    intel_source_name = "intel.cpp" # Just the filename
-    barrier_source_name = "barrier_main.cpp" # Just the filename
-
-    for threads in fixed_thread_counts:
-        print(f"\n[INFO] Starting experiments for {threads} THREADS\n" + "="*50)
-        for m_size in matrix_sizes_to_test:
-            print(f"[INFO] --- Matrix Size: {m_size}x{m_size} ---")
-            for cycle in range(1, runs_per_config + 1):
-                print(f"[INFO] Cycle {cycle}/{runs_per_config}")
-
-                # 1. Without Priority
-                ab_np = ALPHA_BETA_NO_PRIORITY
-                time_val = run_scalability_experiment(abs_parqr_root_dir, abs_makefile_path, intel_source_name, 
-                                                      m_size, threads, 0, ab_np["alpha"], ab_np["beta"])
-                print(f"  Without Priority ({ab_np['alpha']},{ab_np['beta']}), {threads} Thr, {m_size}x{m_size} => {time_val} ms")
-                if time_val is not None: all_run_data.append({"Method": "Without Priority", "MatrixSize": m_size, "Threads": threads, "Time_ms": time_val})
-
-                # 2. With Priority
-                ab_wp = ALPHA_BETA_WITH_PRIORITY
-                time_val = run_scalability_experiment(abs_parqr_root_dir, abs_makefile_path, intel_source_name, 
-                                                      m_size, threads, 1, ab_wp["alpha"], ab_wp["beta"])
-                print(f"  With Priority ({ab_wp['alpha']},{ab_wp['beta']}), {threads} Thr, {m_size}x{m_size} => {time_val} ms")
-                if time_val is not None: all_run_data.append({"Method": "With Priority", "MatrixSize": m_size, "Threads": threads, "Time_ms": time_val})
-                
-                # 3. Barrier
-                ab_b = ALPHA_BETA_BARRIER
-                time_val = run_scalability_experiment(abs_parqr_root_dir, abs_makefile_path, barrier_source_name, 
-                                                      m_size, threads, None, ab_b["alpha"], ab_b["beta"])
-                print(f"  Barrier ({ab_b['alpha']},{ab_b['beta']}), {threads} Thr, {m_size}x{m_size} => {time_val} ms")
-                if time_val is not None: all_run_data.append({"Method": "Barrier", "MatrixSize": m_size, "Threads": threads, "Time_ms": time_val})
-
-    if not all_run_data: print("[WARN] No data collected. Exiting."); return
-    
-    df_all_runs = pd.DataFrame(all_run_data)
-    df_averaged = df_all_runs.groupby(["Method", "MatrixSize", "Threads"], as_index=False)["Time_ms"].mean()
-    df_averaged.rename(columns={"Time_ms": "AvgTime_ms"}, inplace=True)
+    # The /dev/shm matrices hold RAM until they are removed, so they are removed however the sweep ends
+    try:
+        pregenerate_matrices(abs_parqr_root_dir, matrix_sizes_to_test)
+
+        # times[method, size, threads, cycle] in ms; failed runs stay NaN
+        times = np.full((len(SCALABILITY_METHODS), len(matrix_sizes_to_test), len(fixed_thread_counts), runs_per_config), np.nan)
+
+        # The binary only depends on the method, so build it once and reuse it for every thread count, size and cycle.
+        # The builds run in parallel with each other, but all finish before the first timed run: a compile running
+        # alongside the QR runs would compete with them for the cores and memory bandwidth being measured.
+        executables = prepare_all_binaries(abs_parqr_root_dir)
+        run_order = [(thread_id, method_id) for thread_id in range(len(fixed_thread_counts)) for method_id in range(len(SCALABILITY_METHODS))]
+
+        results_dir = "results_scalability" # Will be created in the script's directory (e.g., scripts/results_scalability)
+        os.makedirs(results_dir, exist_ok=True)
+        # Every successful run is appended (and fsync'd) as it completes, so a crash keeps the runs done so far
+        raw_csv_filename = os.path.join(results_dir, "scalability_runs_raw.csv")
+        with open(raw_csv_filename, "w", newline="") as raw_csv_file:
+            raw_writer = csv.DictWriter(raw_csv_file, fieldnames=["Method", "MatrixSize", "Threads", "Cycle", "Time_ms"])
+            raw_writer.writeheader()
+            for thread_id, method_id in run_order:
+                threads = fixed_thread_counts[thread_id]
+                method_label, _, _, alpha_beta = SCALABILITY_METHODS[method_id]
+                if method_id == 0:
+                    print(f"\n[INFO] Starting experiments for {threads} THREADS\n" + "="*50)
+                print(f"[INFO] --- Method: {method_label} ({alpha_beta['alpha']},{alpha_beta['beta']}) ---")
+                exe_cmd = [executables[method_id], "--alpha", str(alpha_beta["alpha"]), "--beta", str(alpha_beta["beta"])]
+                server = start_qr_server(abs_parqr_root_dir, exe_cmd, threads)
+                for size_id, m_size in enumerate(matrix_sizes_to_test):
+                    for cycle in range(1, runs_per_config + 1):
+                        if server.poll() is not None: # Crashed on an earlier run; carry on with a fresh one
+                            server = start_qr_server(abs_parqr_root_dir, exe_cmd, threads)
+                        time_val = run_scalability_experiment(abs_parqr_root_dir, exe_cmd, threads, server, m_size)
+                        print(f"  {method_label} ({alpha_beta['alpha']},{alpha_beta['beta']}), {threads} Thr, {m_size}x{m_size}, Cycle {cycle}/{runs_per_config} => {time_val} ms")
+                        if time_val is not None:
+                            times[method_id, size_id, thread_id, cycle - 1] = time_val
+                            raw_writer.writerow({"Method": method_label, "MatrixSize": m_size, "Threads": threads,
+                                                 "Cycle": cycle, "Time_ms": time_val})
+                            raw_csv_file.flush()
+                            os.fsync(raw_csv_file.fileno())
+                stop_qr_server(server)
+    finally:
+        remove_shm_matrices(matrix_sizes_to_test)
+
+    # Average over cycles in one reduction; cells where every cycle failed stay NaN and are dropped below
+    run_counts = np.count_nonzero(~np.isnan(times), axis=-1)
+    if not run_counts.any():
+        print("[WARN] No data collected. Exiting.")
+        return
+    avg_times = np.where(run_counts > 0, np.nansum(times, axis=-1) / np.maximum(run_counts, 1), np.nan)
+
+    # Flatten to a table only for the CSV and plots
+    method_idx, size_idx, thread_idx = np.nonzero(run_counts)
+    method_labels = np.array([method[0] for method in SCALABILITY_METHODS])
+    df_averaged = pd.DataFrame({"Method": method_labels[method_idx],
+                                "MatrixSize": np.asarray(matrix_sizes_to_test)[size_idx],
+                                "Threads": np.asarray(fixed_thread_counts)[thread_idx],
+                                "AvgTime_ms": avg_times[method_idx, size_idx, thread_idx]})
     df_averaged["AvgTime_s"] = df_averaged["AvgTime_ms"] / 1000.0
 
-    results_dir = "results_scalability" # Will be created in the script's directory (e.g., scripts/results_scalability)
-    os.makedirs(results_dir, exist_ok=True)
+    print(f"[INFO] Raw per-run results saved to: {os.path.abspath(raw_csv_filename)}")
     csv_filename = os.path.join(results_dir, "scalability_analysis_results.csv")
     df_averaged.to_csv(csv_filename, index=False)
     print(f"[INFO] Averaged results saved to: {os.path.abspath(csv_filename)}")
 
+    # Imported only now, in the main process: the matrix-generation workers never load matplotlib
+    import matplotlib
+    matplotlib.use("Agg") # Headless backend; must be selected before pyplot is imported
+    import matplotlib.pyplot as plt
+
     for threads_to_plot in fixed_thread_counts:
         df_plot = df_averaged[df_averaged["Threads"] == threads_to_plot]
         if df_plot.empty:
@@ -1,46 +1,114 @@
 #!/usr/bin/env python3
+import argparse
+import functools
+import json
+import logging
 import re
 import subprocess
 import sys
+import time
 import numpy as np
 import csv
 import os
-import matplotlib.pyplot as plt
+import pickle
+import shutil
+import tempfile
 import pandas as pd
-from collections import defaultdict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from parqr_build import MAIN_SRC_RE, build_key, cached_binary_path, publish_binary, rewrite_file, worker_tree
+
+# EXP3_LOG=WARNING keeps a sweep quiet apart from problems; EXP3_LOG=DEBUG also shows make's output
+_log_level = os.environ.get("EXP3_LOG", "INFO").upper()
+_known_log_level = isinstance(logging.getLevelName(_log_level), int) # Unknown names map to "Level X" strings
+logging.basicConfig(level=_log_level if _known_log_level else logging.INFO, format="[%(levelname)s] %(message)s")
+log = logging.getLogger("exp3")
+if not _known_log_level:
+    log.warning(f"Ignoring unknown EXP3_LOG={os.environ['EXP3_LOG']!r}; using INFO.")
 
 # ------------------------------------------------------------------------------
 # Matrix Generation Helper
 # ------------------------------------------------------------------------------
+def matrix_meta_matches(filepath, rows, cols, seed_value):
+    # filepath + ".meta" records how the matrix file was generated
+    try:
+        with open(filepath + ".meta") as f:
+            return json.load(f) == {"rows": rows, "cols": cols, "seed": seed_value}
+    except (OSError, ValueError):
+        return False
+
 def generate_matrix_if_needed(rows, cols, filepath, force_regenerate=False):
-    if not os.path.exists(filepath) or force_regenerate:
-        print(f"[INFO] Matrix file {filepath} not found or regeneration forced. Generating new matrix {rows}x{cols}...")
+    # Besides the text file, a binary .npy sidecar with the same values is kept next to it; a.out maps
+    # that one instead of parsing ASCII, so every run of the sweep skips the text parse
+    npy_filepath = os.path.splitext(filepath)[0] + ".npy"
+    seed_value = rows * 100000 + cols 
+    # The matrix is a pure function of (rows, cols, seed): files whose .meta records different parameters are
+    # stale and redrawn; files without a .meta are trusted, and --force-rng (force_regenerate) redraws anyway
+    if not force_regenerate and os.path.exists(filepath + ".meta") and not matrix_meta_matches(filepath, rows, cols, seed_value):
+        log.info(f"Matrix file {filepath} was not generated as {rows}x{cols}, seed {seed_value}; regenerating.")
+        force_regenerate = True
+    write_text = force_regenerate or not os.path.exists(filepath)
+    write_npy = force_regenerate or not os.path.exists(npy_filepath)
+    if write_text or write_npy:
+        log.info(f"Matrix file {filepath if write_text else npy_filepath} not found or regeneration forced. Generating new matrix {rows}x{cols}...")
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        seed_value = rows * 100000 + cols 
-        np.random.seed(seed_value)
-        matrix_data = np.random.rand(rows, cols) * 20 - 10
+        # Same seed and draw order as np.random.seed(seed_value); np.random.rand(rows, cols), so the file is
+        # identical, but only one block of rows is held in memory at a time
+        random_state = np.random.RandomState(seed_value)
+        # Both files are written under temporary names and renamed into place once complete, and the .meta
+        # describing them is written last: an interrupted write never leaves a truncated file that a .meta vouches for
+        text_tmp_filepath = filepath + ".tmp"
+        npy_tmp_filepath = npy_filepath + ".tmp"
         try:
-            with open(filepath, 'w') as f:
-                for i in range(rows):
-                    f.write(' '.join(map(lambda x: f"{x:.6f}", matrix_data[i])) + '\n')
-            print(f"[INFO] Successfully generated and saved matrix to {filepath}")
+            # Same "%.6f" space-separated text the loaders expect, but formatted in C by numpy
+            write_start = time.perf_counter()
+            with open(text_tmp_filepath if write_text else os.devnull, "w") as f:
+                # The .npy is filled block by block through a memory map and renamed into place when complete
+                npy_data = np.lib.format.open_memmap(npy_tmp_filepath, mode="w+", dtype=np.float64, shape=(rows, cols)) if write_npy else None
+                for row_start in range(0, rows, matrix_block_rows):
+                    block = random_state.rand(min(matrix_block_rows, rows - row_start), cols) * 20 - 10
+                    if write_text:
+                        np.savetxt(f, block, fmt="%.6f", delimiter=" ")
+                    if write_npy:
+                        npy_data[row_start:row_start + len(block)] = np.round(block, 6) # Rounded like the text file
+            if write_text:
+                os.replace(text_tmp_filepath, filepath)
+            if write_npy:
+                npy_data.flush()
+                del npy_data
+                os.replace(npy_tmp_filepath, npy_filepath)
+            with open(filepath + ".meta.tmp", "w") as f:
+                json.dump({"rows": rows, "cols": cols, "seed": seed_value}, f)
+            os.replace(filepath + ".meta.tmp", filepath + ".meta")
+            written_paths = [path for path, written in ((filepath, write_text), (npy_filepath, write_npy)) if written]
+            log.info(f"Successfully generated and saved matrix to {' and '.join(written_paths)} (generated and written in {time.perf_counter() - write_start:.2f} s)")
         except IOError as e:
-            print(f"[ERROR] Could not write matrix file {filepath}: {e}")
+            log.error(f"Could not write matrix file {filepath}: {e}")
             sys.exit(1)
+        finally:
+            for tmp_path in (text_tmp_filepath, npy_tmp_filepath, filepath + ".meta.tmp"): # Left only by a failed write
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
     else:
-        print(f"[DEBUG] Matrix file {filepath} found. Using existing file.")
+        log.debug(f"Matrix file {filepath} found. Using existing file.")
 
 # ------------------------------------------------------------------------------
 # Global Parameters for Experiment 4 (Throughput Evaluation - Fig 5)
 # ------------------------------------------------------------------------------
 fixed_matrix_size = 8192
-runs_per_config = 3
+runs_per_config = 2 # Cycle 1 is a warmup run; the reported time is the median of the cycles after it
+matrix_block_rows = 256 # Rows generated and written per block when creating the matrix file
+checkpoint_file_name = "throughput_checkpoint.pkl" # In results_throughput/; lets an interrupted sweep resume
 
 # --- Paths RELATIVE TO THIS SCRIPT'S LOCATION (e.g., ParQR/scripts/) ---
 base_testcase_folder_rel = "../testcase" 
 executable_name_rel = "../a.out"        
 makefile_name_rel = "../Makefile"        
 parqr_root_dir_rel = ".."                
+build_workers = 4 # Binaries compiled concurrently, each in a private copy of the tree; runs stay serial
+make_jobs = max(1, (os.cpu_count() or 1) // build_workers) # Bounded `make -jN` per build worker, so together they fill the CPUs once
+time_re = re.compile(r"(?:Execution Time|Time taken):\s*([0-9.]+)\s*ms") # Timing line of a.out's stdout, compiled once
+stdout_tail_lines = 50 # Lines of a.out's stdout kept for error reports; the rest is scanned and dropped
 # --- Absolute paths will be resolved in main() or relevant functions ---
 
 # Thread configurations for data collection (dense)
@@ -65,6 +133,11 @@ ALPHA_BETA_CONFIGS = {
     # "intel_optimal_wp": {"alpha": 30, "beta": 30, "prio": 1, "source_file": "intel.cpp", "label": "Intel Optimal (with prio)", "method_label": "With Priority (Optimal)"},
     # "barrier_optimal":  {"alpha": 12, "beta": 12, "prio": None, "source_file": "barrier_main.cpp", "label": "Barrier Optimal", "method_label": "Barrier (Optimal)"},
 }
+# One record per individual run; the string widths fit the longest label/key above
+RUN_DTYPE = [("MethodLabel", f"U{max(len(p['method_label']) for p in ALPHA_BETA_CONFIGS.values())}"),
+             ("ConfigKey", f"U{max(len(k) for k in ALPHA_BETA_CONFIGS)}"),
+             ("Threads", "i4"), ("Cycle", "i4"), ("Time_ms", "f8")]
+
 # Which configurations to use for the main Figure 5 plot
 # UPDATE THESE KEYS TO POINT TO THE "OPTIMAL" CONFIGURATIONS IF YOU ADD THEM ABOVE
 FIG5_PLOT_KEYS = {
@@ -78,59 +151,143 @@ FIG5_PLOT_KEYS = {
 # ------------------------------------------------------------------------------
 def update_makefile(abs_makefile_path, source_file_name_only):
     # MAIN_SRC in Makefile expects just the filename (e.g., intel.cpp) as .cpp files are in root
-    cmd = f"sed -i 's|^MAIN_SRC * =.*|MAIN_SRC = {source_file_name_only}|' {abs_makefile_path}"
-    subprocess.run(cmd, shell=True, check=True)
-    print(f"[DEBUG] Updated Makefile ({abs_makefile_path}) to use {source_file_name_only}")
-
-def update_cpp_macro(abs_source_file_path, macro_name, macro_value):
-    regex = f"'s/^#define[[:space:]]\\+{macro_name}[[:space:]]\\+[0-9.]\\+/#define {macro_name} {macro_value}/'"
-    cmd = f"sed -i {regex} {abs_source_file_path}"
-    subprocess.run(cmd, shell=True, check=True)
-    print(f"[DEBUG] Updated {abs_source_file_path}: {macro_name}={macro_value}")
-
-def compile_code_cli(abs_parqr_root_dir):
-    print("[DEBUG] Compiling code...")
-    subprocess.run("make clean", shell=True, check=True, cwd=abs_parqr_root_dir)
-    ret = subprocess.run("make -j", shell=True, cwd=abs_parqr_root_dir)
-    if ret.returncode != 0: print("[ERROR] Compilation failed."); sys.exit(1)
-    print("[DEBUG] Compilation succeeded.")
-
-def get_matrix_file_path_for_exe(current_rows, current_cols, abs_parqr_root_dir, rel_testcase_folder_from_root="testcase"):
+    rewrite_file(abs_makefile_path, [(MAIN_SRC_RE, f"MAIN_SRC = {source_file_name_only}")])
+    log.debug(f"Updated Makefile ({abs_makefile_path}) to use {source_file_name_only}")
+
+def macros_to_cflags(macros):
+    return " ".join(f"-D{name}={value}" for name, value in macros.items())
+
+def compile_code_cli(abs_parqr_root_dir, extra_cflags=""):
+    log.debug(f"Compiling code... {extra_cflags}")
+    # No `make clean`: the Makefile's flags stamp rebuilds main.o whenever MAIN_SRC/EXTRA_CFLAGS change
+    # make's command echo is only useful when debugging; compiler errors still come through on stderr
+    make_stdout = None if log.isEnabledFor(logging.DEBUG) else subprocess.DEVNULL
+    ret = subprocess.run(["make", f"-j{make_jobs}", f"EXTRA_CFLAGS={extra_cflags}"], cwd=abs_parqr_root_dir, stdout=make_stdout)
+    if ret.returncode != 0:
+        log.error("Compilation failed.")
+        sys.exit(1)
+    log.debug("Compilation succeeded.")
+
+def get_cached_binary(abs_parqr_root_dir, abs_makefile_path, source_file_name_only, macros, cache_root_dir=None):
+    """Returns the path of a binary built for (source, macros), compiling it only on a cache miss."""
+    key = build_key(abs_parqr_root_dir, source_file_name_only, macros)
+    # The cache normally lives in the tree being built; build workers point it at the main tree instead
+    cached_binary = cached_binary_path(cache_root_dir or abs_parqr_root_dir, key)
+    if os.path.exists(cached_binary):
+        log.debug(f"Build cache hit for {source_file_name_only} ({macros_to_cflags(macros)}): {key[:12]}")
+        return cached_binary
+
+    update_makefile(abs_makefile_path, source_file_name_only)
+    compile_code_cli(abs_parqr_root_dir, macros_to_cflags(macros))
+    publish_binary(os.path.join(abs_parqr_root_dir, "a.out"), cached_binary) # Other build workers may be reading this key
+    log.debug(f"Cached binary for {source_file_name_only} ({macros_to_cflags(macros)}): {key[:12]}")
+    return cached_binary
+
+def get_matrix_file_path_for_exe(current_rows, current_cols, abs_parqr_root_dir, rel_testcase_folder_from_root="testcase", force_regenerate=False):
     abs_testcase_dir = os.path.join(abs_parqr_root_dir, rel_testcase_folder_from_root)
     matrix_file_abs_path = os.path.join(abs_testcase_dir, f"matrix_{current_rows}x{current_cols}.txt")
-    generate_matrix_if_needed(current_rows, current_cols, matrix_file_abs_path)
-    if not os.path.exists(matrix_file_abs_path): print(f"[ERROR] Matrix file {matrix_file_abs_path} still not found."); sys.exit(1)
-    return os.path.join(rel_testcase_folder_from_root, f"matrix_{current_rows}x{current_cols}.txt")
+    generate_matrix_if_needed(current_rows, current_cols, matrix_file_abs_path, force_regenerate)
+    if not os.path.exists(matrix_file_abs_path):
+        log.error(f"Matrix file {matrix_file_abs_path} still not found.")
+        sys.exit(1)
+    # The executable reads the binary sidecar written alongside the text file
+    return os.path.join(rel_testcase_folder_from_root, f"matrix_{current_rows}x{current_cols}.npy")
 
-def run_executable_cli(abs_parqr_root_dir, current_rows, current_cols, matrix_file_path_for_exe):
-    executable_in_cwd = "./a.out" 
+@functools.lru_cache(maxsize=16)
+def _matrix_path(rows, cols, root):
+    # The sweep uses one matrix size throughout: generate/check the file once, then reuse the path
+    return get_matrix_file_path_for_exe(rows, cols, root)
+
+def run_executable_cli(abs_parqr_root_dir, current_rows, current_cols, matrix_file_path_for_exe, threads, executable_in_cwd="./a.out"):
+    # Defaults to "a.out" in abs_parqr_root_dir; cached binaries are passed as absolute paths
     cmd_list = [executable_in_cwd, matrix_file_path_for_exe]
-    print(f"[DEBUG] Running command (from {abs_parqr_root_dir}): {' '.join(cmd_list)}")
-    try:
-        result = subprocess.run(cmd_list, capture_output=True, text=True, check=True, cwd=abs_parqr_root_dir)
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] Error running executable. Return code: {e.returncode}"); print(f"  Stdout: {e.stdout.strip()}"); print(f"  Stderr: {e.stderr.strip()}"); return None
-    except FileNotFoundError as e:
-        print(f"[ERROR] FileNotFoundError: {e}"); print(f"  Cmd: {' '.join(cmd_list)}, CWD: {abs_parqr_root_dir}"); return None
-    match = re.search(r"(?:Execution Time|Time taken):\s*([0-9.]+)\s*ms", result.stdout)
-    if match: return float(match.group(1))
-    else: print("[ERROR] Time not found in output."); print("--- STDOUT ---"); print(result.stdout.strip()); print("--- STDERR ---"); print(result.stderr.strip()); return None
-
-def run_throughput_experiment(abs_parqr_root_dir, abs_makefile_path, source_file_name_only, 
-                              thread_count, priority_val, alpha_val, beta_val):
-    # .cpp files are in the abs_parqr_root_dir
-    abs_source_file_path = os.path.join(abs_parqr_root_dir, source_file_name_only)
-
-    update_makefile(abs_makefile_path, source_file_name_only) # Pass only filename
-    update_cpp_macro(abs_source_file_path, "NUM_THREADS", thread_count)
+    # a.out reads its worker count from NUM_THREADS at run time, so it is always set explicitly: one
+    # inherited from the caller's environment would otherwise run every point at the same count
+    env = {**os.environ, "NUM_THREADS": str(threads)}
+    log.debug(f"Running command (from {abs_parqr_root_dir}): NUM_THREADS={threads} {' '.join(cmd_list)}")
+    # stdout is scanned line by line as it arrives instead of being buffered whole; stderr goes to a
+    # temporary file so a chatty run can never block on a full pipe that nobody reads
+    with tempfile.TemporaryFile(mode="w+") as stderr_file:
+        try:
+            proc = subprocess.Popen(cmd_list, stdout=subprocess.PIPE, stderr=stderr_file, text=True, bufsize=1, cwd=abs_parqr_root_dir, env=env)
+        except FileNotFoundError as e:
+            log.error(f"FileNotFoundError: {e}\n  Cmd: {' '.join(cmd_list)}, CWD: {abs_parqr_root_dir}")
+            return None
+        exec_time = None
+        stdout_tail = deque(maxlen=stdout_tail_lines)
+        with proc.stdout:
+            for line in proc.stdout:
+                if exec_time is None:
+                    match = time_re.search(line)
+                    if match:
+                        exec_time = float(match.group(1))
+                stdout_tail.append(line)
+        returncode = proc.wait()
+        if returncode == 0 and exec_time is not None:
+            return exec_time
+        stderr_file.seek(0)
+        stderr_text = stderr_file.read().strip()
+    stdout_text = "".join(stdout_tail).strip()
+    if returncode != 0:
+        log.error(f"Error running executable. Return code: {returncode}\n  Stdout: {stdout_text}\n  Stderr: {stderr_text}")
+        return None
+    log.error(f"Time not found in output.\n--- STDOUT ---\n{stdout_text}\n--- STDERR ---\n{stderr_text}")
+    return None
+
+def prepare_binary(abs_parqr_root_dir, abs_makefile_path, source_file_name_only, priority_val, alpha_val, beta_val, cache_root_dir=None):
+    # Macros are passed as -D flags; the sources themselves are never edited. The thread count is not one:
+    # it is set per run through NUM_THREADS, so every thread count of a config shares one binary.
+    macros = {}
     if priority_val is not None:
-        update_cpp_macro(abs_source_file_path, "USE_PRIORITY_MAIN_QUEUE", priority_val)
-    update_cpp_macro(abs_source_file_path, "ALPHA", alpha_val)
-    update_cpp_macro(abs_source_file_path, "BETA", beta_val)
-    
-    compile_code_cli(abs_parqr_root_dir)
-    matrix_file_for_exe = get_matrix_file_path_for_exe(fixed_matrix_size, fixed_matrix_size, abs_parqr_root_dir)
-    exec_time = run_executable_cli(abs_parqr_root_dir, fixed_matrix_size, fixed_matrix_size, matrix_file_for_exe)
+        macros["USE_PRIORITY_MAIN_QUEUE"] = priority_val
+    macros["ALPHA"] = alpha_val
+    macros["BETA"] = beta_val
+    return get_cached_binary(abs_parqr_root_dir, abs_makefile_path, source_file_name_only, macros, cache_root_dir)
+
+def prepare_binary_in_worker_tree(abs_parqr_root_dir, build_trees_dir, source_file_name_only, priority_val, alpha_val, beta_val):
+    # Build-pool job: each worker process compiles in its own copy of the ParQR tree, so concurrent builds
+    # never share the Makefile or build/, and publishes the binary into the main tree's build cache
+    worker_root = worker_tree(abs_parqr_root_dir, build_trees_dir)
+    return prepare_binary(worker_root, os.path.join(worker_root, "Makefile"), source_file_name_only,
+                          priority_val, alpha_val, beta_val, cache_root_dir=abs_parqr_root_dir)
+
+def prepare_all_binaries(abs_parqr_root_dir, config_keys):
+    """Builds the binary of every config in parallel; returns {config_key: path}."""
+    max_workers = max(1, min(build_workers, len(config_keys)))
+    log.info(f"Building {len(config_keys)} binaries with {max_workers} parallel build worker(s)...")
+    build_trees_dir = tempfile.mkdtemp(prefix="parqr_build_trees_")
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {}
+            for config_key in config_keys:
+                params = ALPHA_BETA_CONFIGS[config_key]
+                futures[config_key] = pool.submit(prepare_binary_in_worker_tree, abs_parqr_root_dir, build_trees_dir,
+                                                  params["source_file"], params["prio"], params["alpha"], params["beta"])
+            return {job: future.result() for job, future in futures.items()} # Re-raises a failed build's SystemExit here
+    finally:
+        shutil.rmtree(build_trees_dir, ignore_errors=True)
+
+def load_checkpoint(checkpoint_path):
+    """Returns the (done, runs) saved by an interrupted sweep with the same settings, or empty ones."""
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "rb") as f:
+            checkpoint = pickle.load(f)
+        if checkpoint["settings"] == (fixed_matrix_size, runs_per_config):
+            log.info(f"Resuming from {checkpoint_path}: {len(checkpoint['done'])} (config, threads) pairs already measured.")
+            return checkpoint["done"], checkpoint["runs"]
+        log.warning(f"Ignoring {checkpoint_path}: it was written with different settings.")
+    return set(), np.empty(0, dtype=RUN_DTYPE)
+
+def save_checkpoint(checkpoint_path, done, runs):
+    # Written to a temporary file and swapped in atomically
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"settings": (fixed_matrix_size, runs_per_config), "done": done, "runs": runs}, f)
+    os.replace(tmp_path, checkpoint_path)
+
+def run_throughput_experiment(abs_parqr_root_dir, executable, threads):
+    matrix_file_for_exe = _matrix_path(fixed_matrix_size, fixed_matrix_size, abs_parqr_root_dir)
+    exec_time = run_executable_cli(abs_parqr_root_dir, fixed_matrix_size, fixed_matrix_size, matrix_file_for_exe, threads, executable)
     return exec_time
 
 # ------------------------------------------------------------------------------
@@ -143,6 +300,11 @@ def run_throughput_experiment(abs_parqr_root_dir, abs_makefile_path, source_file
 # Main Experiment Execution (Reordered for Experiment 4)
 # ------------------------------------------------------------------------------
 def main():
+    parser = argparse.ArgumentParser(description="Throughput evaluation sweep over thread counts (Fig. 5 data).")
+    parser.add_argument("--force-rng", action="store_true",
+                        help="Redraw the matrix files before the sweep even if they already exist.")
+    args = parser.parse_args()
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
 
@@ -151,66 +313,109 @@ def main():
     abs_makefile_path = os.path.join(abs_parqr_root_dir, makefile_name_rel.lstrip("../").lstrip("./"))
 
     if not os.path.exists(abs_executable_path):
-        print(f"[INFO] Executable not found at {abs_executable_path}. Attempting initial compile...")
+        log.info(f"Executable not found at {abs_executable_path}. Attempting initial compile...")
         compile_code_cli(abs_parqr_root_dir)
         if not os.path.exists(abs_executable_path): 
-            print(f"[ERROR] Executable still not found at {abs_executable_path}. Exiting.")
+            log.error(f"Executable still not found at {abs_executable_path}. Exiting.")
             sys.exit(1)
         else: 
-            print(f"[INFO] Executable found at {abs_executable_path} after compilation.")
+            log.info(f"Executable found at {abs_executable_path} after compilation.")
     else: 
-        print(f"[INFO] Executable found at {abs_executable_path}.")
-
-    all_run_data = [] # This will store data from EACH individual run (not averaged yet)
-
-    for threads in thread_configs_to_run:
-        print(f"\n[INFO] Starting experiments for {threads} THREADS\n" + "="*50)
-        # Loop for each cycle (run)
-        for cycle in range(1, runs_per_config + 1):
-            print(f"[INFO] --- Cycle {cycle}/{runs_per_config} for {threads} THREADS ---")
-            # Loop through all defined Alpha/Beta configurations for this cycle
-            for config_key, params in ALPHA_BETA_CONFIGS.items():
-                current_source_name = params["source_file"]
-                
-                print(f"[INFO] Running Config: {params['label']}, Threads: {threads}")
-                time_val = run_throughput_experiment(abs_parqr_root_dir, abs_makefile_path, current_source_name, 
-                                                     threads, params["prio"], params["alpha"], params["beta"])
-                print(f"  => {time_val} ms")
+        log.info(f"Executable found at {abs_executable_path}.")
+
+    # Generated (or redrawn with --force-rng) once up front; the runs then reuse the files
+    get_matrix_file_path_for_exe(fixed_matrix_size, fixed_matrix_size, abs_parqr_root_dir, force_regenerate=args.force_rng)
+
+    results_dir = "results_throughput"
+    os.makedirs(results_dir, exist_ok=True)
+    checkpoint_path = os.path.join(results_dir, checkpoint_file_name)
+
+    # The runs measured so far and the set of (config, threads) pairs already done, checkpointed after every pair
+    done, saved_runs = load_checkpoint(checkpoint_path)
+    # Every individual run, filled positionally into a preallocated structured array; n_runs counts the filled records
+    runs = np.empty(len(ALPHA_BETA_CONFIGS) * len(thread_configs_to_run) * runs_per_config, dtype=RUN_DTYPE)
+    n_runs = len(saved_runs)
+    runs[:n_runs] = saved_runs
+
+    # The binary only depends on the config, so every one is built up front, in parallel, and reused for each
+    # thread count and cycle. All compiles finish before the first measurement, so they never perturb a timing.
+    executables = prepare_all_binaries(abs_parqr_root_dir, [config_key for config_key in ALPHA_BETA_CONFIGS
+                                                            if any((config_key, threads) not in done for threads in thread_configs_to_run)])
+    for config_key, params in ALPHA_BETA_CONFIGS.items():
+        log.info(f"Starting experiments for config {params['label']}\n" + "="*50)
+        for threads in thread_configs_to_run:
+            if (config_key, threads) in done:
+                continue
+            log.info(f"--- Config: {params['label']}, Threads: {threads} ---")
+            executable = executables[config_key]
+            pair_runs = 0
+            for cycle in range(1, runs_per_config + 1):
+                time_val = run_throughput_experiment(abs_parqr_root_dir, executable, threads)
+                log.info(f"  {params['label']}, {threads} Thr, Cycle {cycle}/{runs_per_config} => {time_val} ms")
                 
                 if time_val is not None:
-                    all_run_data.append({
-                        "MethodLabel": params["method_label"], 
-                        "ConfigKey": config_key, 
-                        "Threads": threads,
-                        "Time_ms": time_val # Store individual time, not yet averaged
-                    })
-        print(f"[INFO] Completed all cycles for all configurations for Threads = {threads}")
-
-    if not all_run_data: 
-        print("[WARN] No data collected. Exiting.")
+                    runs[n_runs] = (params["method_label"], config_key, threads, cycle, time_val)
+                    n_runs += 1
+                    pair_runs += 1
+            if not pair_runs: # Left pending, so a resumed sweep tries this pair again
+                log.warning(f"All runs failed for {params['label']}, {threads} threads. No data recorded for this point.")
+                continue
+            done.add((config_key, threads))
+            save_checkpoint(checkpoint_path, done, runs[:n_runs])
+        log.info(f"Completed all thread counts and cycles for config {params['label']}")
+
+    missing_pairs = [(params["label"], threads) for config_key, params in ALPHA_BETA_CONFIGS.items()
+                     for threads in thread_configs_to_run if (config_key, threads) not in done]
+    if missing_pairs:
+        # The checkpoint is kept, so rerunning the script retries only these pairs
+        save_checkpoint(checkpoint_path, done, runs[:n_runs])
+        log.warning(f"{len(missing_pairs)} (config, threads) pairs have no data (every run failed); rerun to retry them from {checkpoint_path}:\n  "
+                    + "\n  ".join(f"{label}, {threads} threads" for label, threads in missing_pairs))
+
+    if n_runs == 0:
+        log.warning("No data collected. Exiting.")
         return
     
-    # --- Averaging after all individual runs are collected ---
-    df_all_runs = pd.DataFrame(all_run_data)
-    # Group by the unique combination of MethodLabel, ConfigKey, and Threads, then average Time_ms
-    df_averaged_results = df_all_runs.groupby(["MethodLabel", "ConfigKey", "Threads"], as_index=False)["Time_ms"].mean()
-    df_averaged_results.rename(columns={"Time_ms": "AvgTime_ms"}, inplace=True)
-    df_averaged_results["AvgTime_s"] = df_averaged_results["AvgTime_ms"] / 1000.0
+    # --- Per (config, threads) time: median of the post-warmup cycles ---
+    # Cycle 1 runs on cold caches and is discarded; a pair whose later cycles all failed falls back to its
+    # warmup time rather than vanishing. The columns are named MedianTime_* after that statistic.
+    df_runs = pd.DataFrame(runs[:n_runs])
+    df_runs["Warm"] = df_runs["Cycle"] > 1
+    warm_pairs = df_runs.groupby(["ConfigKey", "Threads"])["Warm"].transform("any")
+    df_median_results = (df_runs[df_runs["Warm"] | ~warm_pairs]
+                           .groupby(["MethodLabel", "ConfigKey", "Threads"], as_index=False)["Time_ms"].median()
+                           .rename(columns={"Time_ms": "MedianTime_ms"}))
+    df_median_results["MedianTime_s"] = df_median_results["MedianTime_ms"] / 1000.0
 
-    results_dir = "results_throughput"
-    os.makedirs(results_dir, exist_ok=True)
     csv_filename = os.path.join(results_dir, "throughput_analysis_results.csv")
-    df_averaged_results.to_csv(csv_filename, index=False) # Save the averaged results
-    print(f"[INFO] Averaged results saved to: {os.path.abspath(csv_filename)}")
+    df_median_results.to_csv(csv_filename, index=False, float_format="%.6f") # Save the median results, fixed 6 decimals like the matrix files
+    log.info(f"Median results saved to: {os.path.abspath(csv_filename)}")
+    raw_csv_filename = os.path.join(results_dir, "throughput_runs_raw.csv")
+    df_runs.drop(columns="Warm").to_csv(raw_csv_filename, index=False, float_format="%.6f") # The record array maps straight onto columns
+    log.info(f"Individual run times saved to: {os.path.abspath(raw_csv_filename)}")
+    if not missing_pairs:
+        os.remove(checkpoint_path) # The sweep is complete; the next run starts fresh
+
+    # --- Plotting (uses df_median_results) ---
+    # Imported only now, in the main process: the build workers never load matplotlib
+    import matplotlib
+    matplotlib.use("Agg") # Headless backend; must be selected before pyplot is imported
+    import matplotlib.pyplot as plt
+    # Shared by both figures: simplify and chunk long line paths so Agg rasterizes the thread sweeps faster
+    plt.rcParams.update({"path.simplify": True, "path.simplify_threshold": 1.0, "agg.path.chunksize": 10000})
+
+    # (Threads, MedianTime_s) columns per config, sorted by thread count, built in one pass and shared by both plots
+    series = {config_key: group.sort_values("Threads")[["Threads", "MedianTime_s"]].to_numpy()
+              for config_key, group in df_median_results.groupby("ConfigKey")}
 
-    # --- Plotting (uses df_averaged_results) ---
-    # Diagnostic plot (all collected data, now using averaged results)
+    # Diagnostic plot (all collected data, using the median results)
     plt.figure(figsize=(12, 7))
-    # Group by the broader method label from the averaged data
-    for method_label, group_data in df_averaged_results.groupby("MethodLabel"): 
-        plt.plot(group_data["Threads"], group_data["AvgTime_s"], marker='o', linestyle='-', label=method_label)
+    # One line per config, labelled with its method label, in the same (label) order as before
+    for config_key, params in sorted(ALPHA_BETA_CONFIGS.items(), key=lambda item: item[1]["method_label"]):
+        if config_key in series:
+            plt.plot(series[config_key][:, 0], series[config_key][:, 1], marker='o', linestyle='-', label=params["method_label"])
     plt.xlabel("Thread Count")
-    plt.ylabel("Average Execution Time (s)")
+    plt.ylabel("Median Execution Time (s)")
     plt.title(f"Throughput Comparison (All Configs, Matrix: {fixed_matrix_size}x{fixed_matrix_size})")
     plt.legend(loc='center left', bbox_to_anchor=(1, 0.5))
     plt.grid(True, which="both", ls="-")
@@ -219,31 +424,31 @@ def main():
     diag_plot_path = os.path.abspath(os.path.join(results_dir, "diagnostic_throughput_all_configs.png"))
     plt.savefig(diag_plot_path, dpi=300)
     plt.close()
-    print(f"[INFO] Generated diagnostic plot: {diag_plot_path}")
+    log.info(f"Generated diagnostic plot: {diag_plot_path}")
 
-    # Figure 5 style plot (uses df_averaged_results)
+    # Figure 5 style plot (uses df_median_results)
     plt.figure(figsize=(10, 6))
     markers = {'Barrier': '^', 'Without Priority': 'o', 'With Priority': 's'}
     linestyles = {'Barrier': ':', 'Without Priority': '-', 'With Priority': '--'}
 
     for paper_label, target_config_key in FIG5_PLOT_KEYS.items():
         if target_config_key not in ALPHA_BETA_CONFIGS:
-            print(f"[WARN] Config key '{target_config_key}' for paper label '{paper_label}' not found in ALPHA_BETA_CONFIGS. Skipping.")
+            log.warning(f"Config key '{target_config_key}' for paper label '{paper_label}' not found in ALPHA_BETA_CONFIGS. Skipping.")
             continue
         
-        # Filter the averaged DataFrame using ConfigKey
-        subset = df_averaged_results[(df_averaged_results["ConfigKey"] == target_config_key) &
-                                     (df_averaged_results["Threads"].isin(thread_configs_for_fig5_plot))]
-        if not subset.empty:
-            plt.plot(subset["Threads"], subset["AvgTime_s"],
+        # Only the thread counts shown in Fig. 5
+        subset = series.get(target_config_key, np.empty((0, 2)))
+        subset = subset[np.isin(subset[:, 0], thread_configs_for_fig5_plot)]
+        if len(subset):
+            plt.plot(subset[:, 0], subset[:, 1],
                      marker=markers.get(paper_label, 'x'),
                      linestyle=linestyles.get(paper_label, '-'),
                      label=paper_label)
         else:
-            print(f"[WARN] No averaged data for Fig5 plot: {paper_label} (using config key: {target_config_key})")
+            log.warning(f"No median data for Fig5 plot: {paper_label} (using config key: {target_config_key})")
             
     plt.xlabel("Thread Count")
-    plt.ylabel("Execution Time (s)")
+    plt.ylabel("Median Execution Time (s)")
     plt.title(f"Throughput Evaluation (Matrix: {fixed_matrix_size}x{fixed_matrix_size}) - Fig. 5 Style")
     plt.legend()
     plt.grid(True, which="both", ls="-")
@@ -252,7 +457,7 @@ def main():
     plt.xlim(min(thread_configs_for_fig5_plot)-2, max(thread_configs_for_fig5_plot)+2)
     fig5_plot_path = os.path.abspath(os.path.join(results_dir, "fig5_generated_throughput.png"))
     plt.savefig(fig5_plot_path, dpi=300)
-    print(f"[INFO] Generated Fig. 5 style plot: {fig5_plot_path}")
+    log.info(f"Generated Fig. 5 style plot: {fig5_plot_path}")
     plt.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+"""Build helpers shared by the experiment scripts and the artifact's helper.py (which runs in this tree)."""
+import glob
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+BUILD_CACHE_DIR_NAME = ".build_cache" # Under the ParQR root; one <sha256>/a.out per (source, macros)
+MAIN_SRC_RE = re.compile(r"^MAIN_SRC *=[^\r\n]*", re.M) # The Makefile's MAIN_SRC line, compiled once
+
+def rewrite_file(path, updates):
+    """Applies [(compiled regex, replacement text)] to path in one read and swaps the result in atomically."""
+    with open(path, newline="") as f: # newline="" keeps the file's CRLF line endings intact
+        original = f.read()
+    text = original
+    for pattern, replacement in updates:
+        text = pattern.sub(lambda _match: replacement, text) # Taken literally, never as a template
+    if text == original:
+        return
+    # Written next to path and renamed over it, so an interrupted run never leaves a half-written source or Makefile
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            f.write(text)
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def build_key(root_dir, source_file_name_only, macros):
+    """Hash of everything a.out is built from: the main source, src/*.cpp, include/*.h, the Makefile and the -D macros."""
+    digest = hashlib.sha256(repr(sorted(macros.items())).encode())
+    input_files = ([os.path.join(root_dir, source_file_name_only)] + sorted(glob.glob(os.path.join(root_dir, "src", "*.cpp")))
+                   + sorted(glob.glob(os.path.join(root_dir, "include", "*.h"))) + [os.path.join(root_dir, "Makefile")])
+    for path in input_files:
+        # Paths are hashed relative to the tree, so a copy of the tree (a build worker's) gets the same key
+        digest.update(os.path.relpath(path, root_dir).encode())
+        with open(path, "rb") as f:
+            text = f.read()
+        if path.endswith("Makefile"):
+            # MAIN_SRC is rewritten before every build and is already covered by the source name
+            text = b"".join(line for line in text.splitlines(True) if not line.startswith(b"MAIN_SRC"))
+        digest.update(text)
+    return digest.hexdigest()
+
+def available_memory_bytes():
+    # MemAvailable counts reclaimable page cache, unlike sysconf's free pages; the latter is the fallback
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def worker_tree(root_dir, trees_dir):
+    """Returns this process's private copy of the ParQR tree under trees_dir, copying it on first use."""
+    # A build worker compiles there, so concurrent builds never share the Makefile or build/
+    worker_root = os.path.join(trees_dir, f"worker_{os.getpid()}")
+    if not os.path.isdir(worker_root):
+        shutil.copytree(root_dir, worker_root, ignore=shutil.ignore_patterns(BUILD_CACHE_DIR_NAME, "testcase", "scripts", ".git"))
+    return worker_root
+
+def cached_binary_path(cache_root_dir, key):
+    return os.path.join(cache_root_dir, BUILD_CACHE_DIR_NAME, key, "a.out")
+
+def publish_binary(built_binary, cached_binary):
+    """Copies a freshly built binary into the cache under a temporary name and renames it into place."""
+    # An interrupted copy never leaves a truncated binary at the final path, and builders publishing
+    # the same key at once each rename a complete file over it
+    os.makedirs(os.path.dirname(cached_binary), exist_ok=True)
+    tmp_path = f"{cached_binary}.{os.getpid()}.tmp"
+    try:
+        shutil.copy2(built_binary, tmp_path)
+        os.replace(tmp_path, cached_binary)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
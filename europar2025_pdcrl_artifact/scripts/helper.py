@@ -1,111 +1,289 @@
 # File: scripts_for_docker/master_experiment_runner.py
 import argparse
+import csv
 import json
+import logging
+import multiprocessing
 import os
 import re
+import shutil
+import signal
 import subprocess
 import sys
+import tempfile
+import threading
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg") # Headless backend (no $DISPLAY in the container); must be selected before pyplot is imported
 import matplotlib.pyplot as plt
-from collections import defaultdict
+try:
+    import seaborn as sns # Only the parameter-tuning heatmap's annotated form needs it
+    _HAS_SNS = True
+except ImportError:
+    _HAS_SNS = False
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 import time # For basic timing if needed
+# File rewriting, the build cache and the memory probe are shared with the ParQR tree's own experiment scripts.
+# This runs with that tree as its CWD (the Docker -w directory, checked again in main()), so they are imported
+# from its scripts/.
+sys.path.insert(0, os.path.join(os.getcwd(), "scripts"))
+try:
+    import parqr_build
+except ImportError:
+    parqr_build = None
 
 # --- Configuration (paths relative to Dynamic-Task-Scheduling/ inside container) ---
 MAKEFILE_NAME = "Makefile"
 TESTCASE_DIR = "testcase" 
 RESULTS_DIR = "results" # Subdirectory for CSVs and plots
 EXECUTABLE_NAME = "./a.out" 
+BUILD_CACHE_DIR = ".build_cache" # One <sha256>/a.out per (source, macros); parqr_build.BUILD_CACHE_DIR_NAME, shared with the experiment scripts
+STDOUT_TAIL_LINES = 50 # Lines of a.out's stdout kept for error reports
+DROP_CACHES = False # Set by --drop-caches: drop the page cache before every cycle (cold-cache measurements)
+ASCII_INPUT = False # Set by --ascii: give a.out the text matrix even when its .npy copy exists
+
+# --- Logging: [LEVEL] lines, errors on stderr and the rest on stdout ---
+# LOG_LEVEL=DEBUG also shows every run's command line and timing; LOG_LEVEL=WARNING keeps a sweep quiet apart from problems
+logging.addLevelName(logging.WARNING, "WARN")
+log = logging.getLogger("helper")
+log.propagate = False
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.addFilter(lambda record: record.levelno < logging.ERROR)
+_stderr_handler = logging.StreamHandler(sys.stderr)
+_stderr_handler.setLevel(logging.ERROR)
+for _handler in (_stdout_handler, _stderr_handler):
+    _handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+    log.addHandler(_handler)
+try:
+    log.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+except ValueError:
+    log.setLevel(logging.INFO)
+    log.warning(f"Ignoring unknown LOG_LEVEL={os.environ['LOG_LEVEL']!r}; using INFO.")
 
 # --- Helper Functions (from previous version, mostly unchanged) ---
+def log_debug(message):
+    log.debug(message)
+
 def log_info(message):
-    print(f"[INFO] {message}", flush=True)
+    log.info(message)
 
 def log_warn(message):
-    print(f"[WARN] {message}", flush=True)
+    log.warning(message)
 
 def log_error(message):
-    print(f"[ERROR] {message}", flush=True, file=sys.stderr)
+    log.error(message)
+
+_ensured_matrices = set() # Matrix files already checked/generated by this process
 
 def generate_matrix_if_needed(rows, cols, filepath):
+    # The benchmarks ask for the same few matrices over and over; once a file is known to exist,
+    # skip the log lines and filesystem checks
+    if filepath in _ensured_matrices:
+        return filepath
     log_info(f"Ensuring matrix {rows}x{cols} at {filepath}...")
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    if not os.path.exists(filepath):
-        log_info(f"Generating matrix {rows}x{cols} at {filepath}...")
-        seed_value = rows * 100000 + cols
-        np.random.seed(seed_value)
-        matrix_data = np.random.rand(rows, cols) * 20 - 10
+    # Binary cache of the same values next to the text file (same name as experiment3.py's sidecar, so the
+    # two share it): a missing text file is rewritten from it without redrawing the RNG
+    npy_path = os.path.splitext(filepath)[0] + ".npy"
+    have_text, have_npy = os.path.exists(filepath), os.path.exists(npy_path)
+    if not (have_text and have_npy):
+        if have_npy:
+            log_info(f"Writing matrix {rows}x{cols} to {filepath} from cached {npy_path}...")
+            matrix_data = np.load(npy_path, mmap_mode="r")
+        else:
+            log_info(f"Generating matrix {rows}x{cols} at {filepath}...")
+            seed_value = rows * 100000 + cols
+            np.random.seed(seed_value)
+            matrix_data = np.random.rand(rows, cols) * 20 - 10
         try:
-            with open(filepath, 'w') as f:
-                for i in range(rows):
-                    f.write(' '.join(map(lambda x: f"{x:.6f}", matrix_data[i])) + '\n')
+            if not have_text:
+                # Same "%.6f" space-separated rows as before, formatted in C by numpy instead of per element in Python
+                np.savetxt(filepath, matrix_data, fmt="%.6f", delimiter=" ")
+            if not have_npy:
+                np.round(matrix_data, 6, out=matrix_data) # The values the text file holds
+                npy_tmp_path = npy_path + ".tmp"
+                with open(npy_tmp_path, "wb") as f:
+                    np.save(f, matrix_data)
+                os.replace(npy_tmp_path, npy_path)
             log_info(f"Successfully generated matrix: {filepath}")
         except IOError as e:
             log_error(f"Could not write matrix file {filepath}: {e}")
             sys.exit(1)
     else:
         log_info(f"Using existing matrix: {filepath}")
+    _ensured_matrices.add(filepath)
     return filepath
 
-def update_makefile(source_file_name_only):
-    log_info(f"Updating Makefile: MAIN_SRC = {source_file_name_only}")
-    cmd = f"sed -i 's|^MAIN_SRC * =.*|MAIN_SRC = {source_file_name_only}|' {MAKEFILE_NAME}"
-    try:
-        subprocess.run(cmd, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except subprocess.CalledProcessError as e:
-        log_error(f"Failed to update Makefile: {e.stderr.decode() if e.stderr else e.stdout.decode()}")
-        sys.exit(1)
+def executable_input_path(matrix_path):
+    # The file a.out is run on: the .npy copy written by generate_matrix_if_needed, which a.out maps instead
+    # of parsing every value with strtod, so the measured time is the factorization rather than the text parse
+    npy_path = os.path.splitext(matrix_path)[0] + ".npy"
+    if not ASCII_INPUT and os.path.exists(npy_path):
+        return npy_path
+    return matrix_path
 
-def update_cpp_macro(cpp_file_path, macro_name, macro_value):
-    log_info(f"Updating {cpp_file_path}: {macro_name} = {macro_value}")
-    regex = f"'s/^#define[[:space:]]\\+{macro_name}[[:space:]]\\+[0-9.]\\+/#define {macro_name} {macro_value}/'"
-    cmd = f"sed -i {regex} {cpp_file_path}"
+def rewrite_file(path, updates):
+    # parqr_build.rewrite_file (one read, an atomic rename, CRLF kept); a file that cannot be updated ends the run
     try:
-        subprocess.run(cmd, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except subprocess.CalledProcessError as e:
-        log_error(f"Failed to update macro {macro_name} in {cpp_file_path}: {e.stderr.decode() if e.stderr else e.stdout.decode()}")
+        parqr_build.rewrite_file(path, updates)
+    except OSError as e:
+        log_error(f"Failed to update {path}: {e}")
         sys.exit(1)
 
+def update_makefile(source_file_name_only):
+    log_debug(f"Updating Makefile: MAIN_SRC = {source_file_name_only}")
+    rewrite_file(MAKEFILE_NAME, [(parqr_build.MAIN_SRC_RE, f"MAIN_SRC = {source_file_name_only}")])
+
+def update_cpp_macros(cpp_file_path, updates):
+    # updates: {macro name: value}; rewrites the value of each "#define NAME <number>" line
+    log_debug(f"Updating {cpp_file_path}: {', '.join(f'{name} = {value}' for name, value in updates.items())}")
+    rewrite_file(cpp_file_path, [(re.compile(rf"^#define[ \t]+{name}[ \t]+[0-9.]+", re.M), f"#define {name} {value}")
+                                 for name, value in updates.items()])
+
+MAKE_JOB_MEMORY_BYTES = 2 * 1024**3 # Budget per concurrent compiler process when capping make's -j
+
+def make_command():
+    # A -j in MAKEFLAGS (e.g. MAKEFLAGS=-j$(nproc) from CI) is left to make, and MAKE_JOBS sets the level
+    # outright. Otherwise one job per CPU this process may run on (a parallel benchmark worker's own CPU
+    # slot), capped so every compiler process has MAKE_JOB_MEMORY_BYTES of available memory: a bare
+    # `make -j` starts them all at once and can push a small machine into swap.
+    if re.search(r"(?:^|\s)-j", os.environ.get("MAKEFLAGS", "")):
+        return ["make"]
+    make_jobs = os.environ.get("MAKE_JOBS", "")
+    if make_jobs.isdigit() and int(make_jobs) > 0:
+        return ["make", f"-j{make_jobs}"]
+    if make_jobs:
+        log_warn(f"Ignoring MAKE_JOBS={make_jobs!r}: not a positive integer.")
+    jobs = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    available = parqr_build.available_memory_bytes()
+    if available is not None:
+        jobs = max(1, min(jobs, available // MAKE_JOB_MEMORY_BYTES))
+    return ["make", f"-j{jobs}"]
+
 def compile_code():
-    log_info("Compiling C++ code (make clean && make -j)...")
+    # No `make clean`: make rebuilds main.o from the edited source and the flags stamp covers MAIN_SRC changes
+    cmd_list = make_command()
+    log_info(f"Compiling C++ code ({' '.join(cmd_list)})...")
     try:
-        subprocess.run("make clean", shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        compile_proc = subprocess.run("make -j", shell=True, check=True, capture_output=True, text=True)
+        compile_proc = subprocess.run(cmd_list, check=True, capture_output=True, text=True)
         log_info("Compilation successful.")
     except subprocess.CalledProcessError as e:
         log_error("Compilation failed!")
         log_error(f"STDOUT:\n{e.stdout}")
         log_error(f"STDERR:\n{e.stderr}")
         sys.exit(1)
+    except OSError as e: # No shell in between, so a missing make surfaces here instead of as exit code 127
+        log_error(f"Could not run {cmd_list[0]}: {e}")
+        sys.exit(1)
 
-def run_executable(matrix_file_for_exe, time_regex_str, timeout_seconds=3600): # Default 1hr timeout for benchmarks
-    cmd_list = [EXECUTABLE_NAME, matrix_file_for_exe]
-    log_info(f"Executing: {' '.join(cmd_list)}")
+def compile_code_cached(cpp_source, macros):
+    # The binary depends on the (macro-edited) source, the shared headers/sources, the Makefile and the macro
+    # values; a sweep that revisits a combination, or is re-run, reuses the cached a.out instead of rebuilding.
+    # Returns the cached binary's path, which is run in place.
+    key = parqr_build.build_key(".", cpp_source, macros)
+    cached_binary = os.path.join(BUILD_CACHE_DIR, key, "a.out")
+    if os.path.exists(cached_binary):
+        log_debug(f"Build cache hit for {cpp_source} {macros}: {key[:12]}")
+        return cached_binary
+    # a.out may be a copy of another configuration's cached binary, possibly newer than main.o; remove it so
+    # make always relinks it from this configuration's objects
+    if os.path.exists(EXECUTABLE_NAME):
+        os.remove(EXECUTABLE_NAME)
+    compile_code()
+    parqr_build.publish_binary(EXECUTABLE_NAME, cached_binary) # Parallel benchmark workers share the cache
+    return cached_binary
+
+def warm_cache(path):
+    # Starts reading the matrix into the page cache before the timed cycles, so they all see the same
+    # (warm) I/O state instead of the first one paying for the disk reads
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
     try:
-        result = subprocess.run(cmd_list, capture_output=True, text=True, check=True, timeout=timeout_seconds)
-        log_info("Execution finished.")
-        # log_info(f"Executable STDOUT:\n{result.stdout.strip()}") # Can be very verbose
-        if result.stderr:
-            log_warn(f"Executable STDERR:\n{result.stderr.strip()}")
-
-        match = re.search(time_regex_str, result.stdout)
-        if match:
-            exec_time_ms = float(match.group(1))
-            log_info(f"Extracted execution time: {exec_time_ms:.2f} ms")
-            return exec_time_ms
-        else:
-            log_error("Could not parse execution time from output.")
-            log_info(f"Search String: {time_regex_str}")
-            log_info(f"Full STDOUT for parsing failure:\n{result.stdout}")
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+def drop_page_caches():
+    # Needs root and a writable /proc/sys (e.g. a --privileged container); main() checks this once up front
+    os.sync()
+    with open("/proc/sys/vm/drop_caches", "w") as f:
+        f.write("3\n")
+
+def prepare_cycle_io(matrix_path, cycle):
+    # Called before every timed cycle: cold runs drop the cache each time, warm runs prefetch once
+    if DROP_CACHES:
+        drop_page_caches()
+    elif cycle == 0:
+        warm_cache(matrix_path)
+
+def run_executable(matrix_file_for_exe, time_regex_str, timeout_seconds=3600, num_threads=None, executable=EXECUTABLE_NAME): # Default 1hr timeout for benchmarks
+    cmd_list = [executable, matrix_file_for_exe]
+    # a.out reads its worker count from NUM_THREADS at run time (the macro is only the default)
+    env = {**os.environ, "NUM_THREADS": str(num_threads), "OMP_NUM_THREADS": str(num_threads)} if num_threads else None
+    log_debug(f"Executing: {f'NUM_THREADS={num_threads} ' if num_threads else ''}{' '.join(cmd_list)}")
+    time_re = re.compile(time_regex_str) # A precompiled pattern (DEFAULT_TIME_RE) is passed through as is
+    # stdout is scanned line by line as it arrives, keeping only a short tail for error reports; stderr goes
+    # to a temporary file so a chatty run can never stall on a full pipe
+    with tempfile.TemporaryFile(mode="w+") as stderr_file:
+        try:
+            proc = subprocess.Popen(cmd_list, stdout=subprocess.PIPE, stderr=stderr_file, text=True, bufsize=1, env=env,
+                                    start_new_session=True)
+        except OSError as e:
+            log_error(f"Could not start {' '.join(cmd_list)}: {e}")
             return None
-    except subprocess.CalledProcessError as e:
-        log_error(f"Execution failed with return code {e.returncode}.")
-        log_error(f"STDOUT:\n{e.stdout.strip()}")
-        log_error(f"STDERR:\n{e.stderr.strip()}")
+        # The timer kills a runaway run even while it prints nothing (the read loop below would block forever).
+        # The whole process group goes, so no child is left holding stdout open.
+        timed_out = threading.Event()
+        def kill_on_timeout():
+            # The run may have finished just as the timer fired; only a kill that lands counts as a timeout
+            if proc.poll() is not None:
+                return
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                return
+            timed_out.set()
+        timer = threading.Timer(timeout_seconds, kill_on_timeout)
+        timer.start()
+        exec_time_ms = None
+        stdout_tail = deque(maxlen=STDOUT_TAIL_LINES)
+        try:
+            with proc.stdout:
+                for line in proc.stdout:
+                    if exec_time_ms is None: # Once found, the rest is only drained
+                        match = time_re.search(line)
+                        if match:
+                            exec_time_ms = float(match.group(1))
+                    stdout_tail.append(line)
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+            timer.join() # A kill already under way sets timed_out before it is checked below
+        stderr_file.seek(0)
+        stderr_text = stderr_file.read().strip()
+    stdout_text = "".join(stdout_tail).strip()
+
+    if timed_out.is_set():
+        log_error(f"Execution timed out (>{timeout_seconds:.0f}s) for: {' '.join(cmd_list)}")
         return None
-    except subprocess.TimeoutExpired:
-        log_error(f"Execution timed out (>{timeout_seconds}s) for: {' '.join(cmd_list)}")
+    if returncode != 0:
+        log_error(f"Execution failed with return code {returncode}.")
+        log_error(f"STDOUT (last {STDOUT_TAIL_LINES} lines):\n{stdout_text}")
+        log_error(f"STDERR:\n{stderr_text}")
         return None
+    log_debug("Execution finished.")
+    if stderr_text:
+        log_warn(f"Executable STDERR:\n{stderr_text}")
+    if exec_time_ms is not None:
+        log_debug(f"Extracted execution time: {exec_time_ms:.2f} ms")
+        return exec_time_ms
+    log_error("Could not parse execution time from output.")
+    log_info(f"Search String: {time_re.pattern}")
+    log_info(f"STDOUT (last {STDOUT_TAIL_LINES} lines) for parsing failure:\n{stdout_text}")
+    return None
 
 def run_single_config_from_dict(config_dict, default_time_regex):
     log_info(f"--- Running Test From Dict: {config_dict.get('test_description', 'Unnamed Dict Config')} ---")
@@ -120,43 +298,216 @@ def run_single_config_from_dict(config_dict, default_time_regex):
     time_regex = config_dict.get("output_time_regex", default_time_regex)
 
     update_makefile(cpp_source)
-    update_cpp_macro(cpp_source, "NUM_THREADS", num_threads)
-    update_cpp_macro(cpp_source, "ALPHA", alpha)
-    update_cpp_macro(cpp_source, "BETA", beta)
+    macro_updates = {"NUM_THREADS": num_threads, "ALPHA": alpha, "BETA": beta}
     if use_priority is not None and "main" in cpp_source.lower():
-        update_cpp_macro(cpp_source, "USE_PRIORITY_MAIN_QUEUE", use_priority)
+        macro_updates["USE_PRIORITY_MAIN_QUEUE"] = use_priority
+    update_cpp_macros(cpp_source, macro_updates)
     
-    compile_code()
+    executable = compile_code_cached(cpp_source, {"NUM_THREADS": num_threads, "ALPHA": alpha, "BETA": beta, "USE_PRIORITY_MAIN_QUEUE": use_priority})
     os.makedirs(TESTCASE_DIR, exist_ok=True)
     matrix_file_for_run = os.path.join(TESTCASE_DIR, f"matrix_{matrix_rows}x{matrix_cols}.txt")
     generate_matrix_if_needed(matrix_rows, matrix_cols, matrix_file_for_run)
+    matrix_file_for_run = executable_input_path(matrix_file_for_run)
 
-    total_time_ms = 0
-    successful_runs = 0
+    # With more than one cycle the first is a warm-up and is not counted (a single-cycle test keeps its run)
+    warmup_cycles = WARMUP_CYCLES if cycles > WARMUP_CYCLES else 0
+    cycle_times_ms = []
     for i in range(cycles):
-        log_info(f"--- Cycle {i+1}/{cycles} ---")
-        exec_time = run_executable(matrix_file_for_run, time_regex, timeout_seconds=120) # Shorter timeout for single config/minimal test
-        if exec_time is not None:
-            total_time_ms += exec_time
-            successful_runs += 1
-        else:
+        log_debug(f"--- Cycle {i+1}/{cycles}{' (warm-up, discarded)' if i < warmup_cycles else ''} ---")
+        prepare_cycle_io(matrix_file_for_run, i)
+        exec_time = run_executable(matrix_file_for_run, time_regex, timeout_seconds=120, num_threads=num_threads, executable=executable) # Shorter timeout for single config/minimal test
+        if exec_time is None:
             log_warn(f"Cycle {i+1} failed or time not parsed.")
+        elif i >= warmup_cycles:
+            cycle_times_ms.append(exec_time)
     
-    if successful_runs > 0:
-        avg_time_ms = total_time_ms / successful_runs
-        log_info(f"--- Average execution time over {successful_runs} successful cycle(s): {avg_time_ms:.2f} ms ---")
-        return avg_time_ms
+    if cycle_times_ms:
+        min_time_ms = min(cycle_times_ms)
+        log_info(f"--- Min execution time over {len(cycle_times_ms)} measured cycle(s): {min_time_ms:.2f} ms (median {np.median(cycle_times_ms):.2f} ms) ---")
+        return min_time_ms
     else:
         log_error(f"--- All {cycles} cycle(s) failed for this configuration. ---")
         return None
 
+# --- Benchmark Tasks (run in-process, or in parallel with --jobs) ---
+_task_binaries = {} # (source, macros) -> cached binary already built or found by this process
+_times = defaultdict(list) # (source, matrix, macros, threads) -> successful run times (ms) seen by this process
+FIRST_RUN_TIMEOUT_S = 3600 # No history for this exact configuration yet
+MIN_RUN_TIMEOUT_S = 60
+RUN_TIMEOUT_MEDIAN_FACTOR = 5
+
+def run_timeout_seconds(times_key):
+    # A run is killed once it takes RUN_TIMEOUT_MEDIAN_FACTOR times the median of the earlier runs of the same
+    # configuration, so one runaway run cannot stall the sweep for an hour. The history is per configuration
+    # (source, matrix, macros and thread count): a slower but valid configuration is never judged by a faster one.
+    history = _times.get(times_key)
+    if not history:
+        return FIRST_RUN_TIMEOUT_S
+    return max(MIN_RUN_TIMEOUT_S, RUN_TIMEOUT_MEDIAN_FACTOR * float(np.median(history)) / 1000.0)
+
+def run_benchmark_task(task):
+    # One benchmark point: point the Makefile/macros at the task's configuration, build (or reuse) the
+    # binary and time its cycles with the task's thread count. Returns the successful cycle times in ms.
+    # The thread count is not a macro, so every thread count and matrix size of a configuration shares one
+    # binary; after its first point, this process skips the source edits and hashing and runs it directly.
+    log_info(f"--- {task['label']} ---")
+    binary_key = (task["source"], tuple(sorted(task["macros"].items())))
+    executable = _task_binaries.get(binary_key)
+    if executable is None or not os.path.exists(executable):
+        update_makefile(task["source"])
+        update_cpp_macros(task["source"], {name: value for name, value in task["macros"].items() if value is not None})
+        executable = _task_binaries[binary_key] = compile_code_cached(task["source"], task["macros"])
+
+    matrix_path = executable_input_path(task["matrix"])
+    times_key = (task["source"], task["matrix"], tuple(sorted(task["macros"].items())), task["threads"])
+    cycle_times_ms = []
+    for cycle in range(task["cycles"]):
+        is_warmup = cycle < WARMUP_CYCLES
+        log_debug(f"  Run {cycle+1}/{task['cycles']}{' (warm-up, discarded)' if is_warmup else ''}")
+        prepare_cycle_io(matrix_path, cycle)
+        exec_time = run_executable(matrix_path, DEFAULT_TIME_RE, timeout_seconds=run_timeout_seconds(times_key),
+                                   num_threads=task["threads"], executable=executable)
+        if exec_time is None:
+            log_warn(f"    Run {cycle+1} failed for {task['label']}. This point might be unstable.")
+            continue
+        _times[times_key].append(exec_time) # Warm-up runs count too: they bound the measured runs after them
+        if not is_warmup:
+            cycle_times_ms.append(exec_time)
+    return cycle_times_ms
+
+def summarize_cycle_times(cycle_times_ms):
+    # The minimum is the reported time: it is the run least disturbed by OS jitter, cache misses and
+    # context switches. Median and mean are kept alongside so plots can be redone with either.
+    return {"MinTime_ms": min(cycle_times_ms), "MedianTime_ms": float(np.median(cycle_times_ms)),
+            "AvgTime_ms": float(np.mean(cycle_times_ms)), "SuccessfulRuns": len(cycle_times_ms)}
+
+def _init_benchmark_worker(source_tree, work_root, build_cache_dir, drop_caches, ascii_input, cpu_slots):
+    # Each worker gets its own copy of the source tree, so its Makefile/macro edits and a.out never race
+    # with another worker's, and its own CPUs, which make and a.out inherit
+    global BUILD_CACHE_DIR, DROP_CACHES, ASCII_INPUT
+    cpus = cpu_slots.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    worker_tree = os.path.join(work_root, f"work_{os.getpid()}")
+    shutil.copytree(source_tree, worker_tree, symlinks=True,
+                    ignore=shutil.ignore_patterns(BUILD_CACHE_DIR, TESTCASE_DIR, RESULTS_DIR, ".git"))
+    os.chdir(worker_tree)
+    BUILD_CACHE_DIR = build_cache_dir
+    DROP_CACHES = drop_caches
+    ASCII_INPUT = ascii_input
+    log_info(f"Benchmark worker {os.getpid()} using CPUs {cpus[0]}-{cpus[-1]} in {worker_tree}")
+
+def run_benchmark_tasks(tasks, jobs):
+    # Yields each task's cycle times, in task order. jobs is an int or "auto" (as many workers as there
+    # are disjoint CPU sets wide enough for the largest thread count in tasks).
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    max_threads = max((task["threads"] for task in tasks), default=1)
+    if jobs == "auto":
+        jobs = len(cpus) // max_threads
+    jobs = max(1, min(int(jobs), len(tasks), len(cpus))) # Every worker needs at least one CPU of its own
+    if jobs == 1:
+        yield from map(run_benchmark_task, tasks)
+        return
+
+    slot_width = len(cpus) // jobs
+    if slot_width < max_threads:
+        log_warn(f"{jobs} workers get {slot_width} CPU(s) each, fewer than the {max_threads} threads some points use; those runs will be oversubscribed.")
+    cpu_slots = multiprocessing.Queue()
+    for slot in range(jobs):
+        cpu_slots.put(cpus[slot * slot_width:(slot + 1) * slot_width])
+    log_info(f"Running {len(tasks)} benchmark points with {jobs} parallel workers...")
+    # Workers run in their own trees, so the matrix paths have to be absolute
+    tasks = [dict(task, matrix=os.path.abspath(task["matrix"])) for task in tasks]
+    work_root = tempfile.mkdtemp(prefix="parqr_work_")
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_benchmark_worker,
+                                 initargs=(os.getcwd(), work_root, os.path.abspath(BUILD_CACHE_DIR), DROP_CACHES, ASCII_INPUT, cpu_slots)) as pool:
+            yield from pool.map(run_benchmark_task, tasks) # A failed build's SystemExit is re-raised here
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+SUMMARY_COLUMNS = ["MinTime_ms", "MedianTime_ms", "AvgTime_ms", "SuccessfulRuns"]
+
+def run_and_record_tasks(tasks, csv_path, jobs, with_seconds=False):
+    # Runs the tasks whose "row" key is not yet recorded and appends each point's row to csv_path + ".part" as
+    # soon as it is measured, so an interrupted sweep loses at most the point in flight and a rerun picks up
+    # where it stopped. Once every point has been tried, the rows are written to csv_path in task order and
+    # moved into place in one os.replace, so csv_path itself is never half-written.
+    # with_seconds adds MinTime_s/AvgTime_s columns for the plots.
+    if not tasks: # E.g. a parameter grid with no valid (alpha, beta) pair: nothing to run or record
+        log_warn(f"No benchmark points to run for {csv_path}.")
+        return
+    key_columns = list(tasks[0]["row"])
+    fieldnames = key_columns + SUMMARY_COLUMNS + (["MinTime_s", "AvgTime_s"] if with_seconds else [])
+    part_path = csv_path + ".part"
+    if not os.path.exists(part_path) and os.path.exists(csv_path):
+        shutil.copyfile(csv_path, part_path) # A rerun of a finished sweep continues from its results
+    done = set()
+    if os.path.exists(part_path) and os.path.getsize(part_path) > 0:
+        with open(part_path, newline="") as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames == fieldnames:
+                done = {tuple(row[col] for col in key_columns) for row in reader}
+            else:
+                log_warn(f"{csv_path} has different columns than this version writes; moving it to {csv_path}.old and starting over.")
+                os.replace(part_path, csv_path + ".old")
+    pending = [task for task in tasks if tuple(str(task["row"][col]) for col in key_columns) not in done]
+    if len(pending) < len(tasks):
+        log_info(f"Resuming: {len(tasks) - len(pending)} of {len(tasks)} points already recorded in {part_path}.")
+
+    if pending:
+        write_header = not os.path.exists(part_path) or os.path.getsize(part_path) == 0
+        missing_labels = []
+        with open(part_path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            if write_header:
+                writer.writeheader()
+            for task, cycle_times_ms in zip(pending, run_benchmark_tasks(pending, jobs)):
+                if not cycle_times_ms: # Not recorded, so a rerun tries this point again
+                    log_warn(f"  All runs failed or timed out for {task['label']}. No data recorded for this point.")
+                    missing_labels.append(task["label"])
+                    continue
+                row = {**task["row"], **summarize_cycle_times(cycle_times_ms)}
+                if with_seconds:
+                    row["MinTime_s"] = row["MinTime_ms"] / 1000.0
+                    row["AvgTime_s"] = row["AvgTime_ms"] / 1000.0
+                writer.writerow(row)
+                f.flush()
+                log_info(f"  Min time ({task['label']}, {len(cycle_times_ms)}/{task['cycles'] - WARMUP_CYCLES} runs): {row['MinTime_ms']:.2f} ms")
+        if missing_labels:
+            log_warn(f"{len(missing_labels)} of {len(pending)} points have no data in {csv_path} (all runs failed or timed out); "
+                     f"rerun to retry them:\n  " + "\n  ".join(missing_labels))
+
+    if not os.path.exists(part_path):
+        return
+    # Resumed points were appended out of order; points no longer in tasks go last
+    task_order = {tuple(str(task["row"][col]) for col in key_columns): idx for idx, task in enumerate(tasks)}
+    with open(part_path, newline="") as f:
+        rows = sorted(csv.DictReader(f), key=lambda row: task_order.get(tuple(row[col] for col in key_columns), len(task_order)))
+    csv_tmp_path = csv_path + ".tmp"
+    with open(csv_tmp_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(csv_tmp_path, csv_path)
+    os.remove(part_path)
+
+def load_recorded_results(csv_path):
+    # Everything recorded in csv_path so far (this run's and earlier runs' points), or None if nothing is
+    if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+        return None
+    df = pd.read_csv(csv_path)
+    return None if df.empty else df
+
 # --- Benchmark Specific Logic ---
 
 # Default time regex, can be overridden by specific configs if needed
 DEFAULT_TIME_REGEX = r"(?:Execution Time|Time taken):\s*([0-9.]+)\s*ms"
-DEFAULT_CYCLES = 3 # Default runs per configuration for benchmarks
+DEFAULT_TIME_RE = re.compile(DEFAULT_TIME_REGEX) # Compiled once for the benchmark runs
+WARMUP_CYCLES = 1 # Leading runs of every point that only warm the page cache; their times are discarded
+DEFAULT_CYCLES = WARMUP_CYCLES + 3 # Default runs per configuration for benchmarks (warm-up + 3 measured)
 
-def run_param_tuning_benchmark(results_basedir):
+def run_param_tuning_benchmark(results_basedir, jobs=1):
     log_info("===== Starting Parameter Tuning Benchmark (Experiment 1 - Fig 2 data) =====")
     
     # Configuration based on your test.py and typical Fig 2 generation
@@ -172,92 +523,54 @@ def run_param_tuning_benchmark(results_basedir):
     matrix_file_path = os.path.join(TESTCASE_DIR, f"matrix_{FIXED_MATRIX_SIZE}x{FIXED_MATRIX_SIZE}.txt")
     generate_matrix_if_needed(FIXED_MATRIX_SIZE, FIXED_MATRIX_SIZE, matrix_file_path)
 
-    # Set C++ source file in Makefile and fixed number of threads
-    update_makefile(main_cpp_file)
-    update_cpp_macro(main_cpp_file, "NUM_THREADS", FIXED_THREADS)
+    # Valid (alpha, beta) pairs, computed once for both priority settings with the validity conditions from
+    # your test.py: both divide the matrix size, beta >= alpha and alpha | beta. Only divisors of the matrix
+    # size are paired up, in the alpha-major order of the original nested loops.
+    divisors = [d for d in PARAM_RANGE if FIXED_MATRIX_SIZE % d == 0]
+    valid_pairs = [(alpha_val, beta_val) for alpha_val in divisors for beta_val in divisors
+                   if beta_val >= alpha_val and beta_val % alpha_val == 0]
 
     # Iterate for "Without Priority" (0) and "With Priority" (1) to generate two heatmaps
     for priority_setting in [0, 1]:
         priority_str = "with_priority" if priority_setting == 1 else "without_priority"
         log_info(f"--- Running Parameter Tuning for: {priority_str.upper()} ---")
         
-        # Set priority macro in intel.cpp
-        update_cpp_macro(main_cpp_file, "USE_PRIORITY_MAIN_QUEUE", priority_setting)
-        
-        current_tuning_results = []
-        
-        # Estimate total valid configurations for progress logging
-        estimated_valid_configs = 0
-        for alpha_val_est in PARAM_RANGE:
-            for beta_val_est in PARAM_RANGE:
-                if beta_val_est >= alpha_val_est and \
-                   beta_val_est % alpha_val_est == 0 and \
-                   FIXED_MATRIX_SIZE % alpha_val_est == 0 and \
-                   FIXED_MATRIX_SIZE % beta_val_est == 0:
-                    estimated_valid_configs += 1
-        
-        actual_configs_run = 0
-        for alpha_val in PARAM_RANGE:
-            for beta_val in PARAM_RANGE:
-                # Apply validity conditions from your test.py
-                if not (beta_val >= alpha_val and \
-                        beta_val % alpha_val == 0 and \
-                        FIXED_MATRIX_SIZE % alpha_val == 0 and \
-                        FIXED_MATRIX_SIZE % beta_val == 0):
-                    continue # Skip invalid (alpha, beta) pair for this matrix size
-
-                actual_configs_run += 1
-                log_info(f"Config {actual_configs_run}/{estimated_valid_configs} ({priority_str}): Alpha={alpha_val}, Beta={beta_val}")
-
-                update_cpp_macro(main_cpp_file, "ALPHA", alpha_val)
-                update_cpp_macro(main_cpp_file, "BETA", beta_val)
-                compile_code() # Recompile due to ALPHA/BETA macro changes
-
-                cycle_times_ms = []
-                for cycle in range(DEFAULT_CYCLES): # DEFAULT_CYCLES should be defined (e.g., 3)
-                    log_info(f"  Run {cycle+1}/{DEFAULT_CYCLES}")
-                    # DEFAULT_TIME_REGEX should be defined
-                    exec_time = run_executable(matrix_file_path, DEFAULT_TIME_REGEX) 
-                    if exec_time is not None:
-                        cycle_times_ms.append(exec_time)
-                    else:
-                        log_warn(f"    Run {cycle+1} failed for Alpha={alpha_val}, Beta={beta_val}, Prio={priority_setting}. This point might be unstable.")
-                        # Decide if a single failed cycle invalidates the (alpha,beta) point
-                        # For parameter tuning, it's often better to get some data if possible
-                
-                if cycle_times_ms: # If at least one run was successful
-                    avg_time_ms = np.mean(cycle_times_ms)
-                    current_tuning_results.append({
-                        "MatrixSize": FIXED_MATRIX_SIZE,
-                        "Threads": FIXED_THREADS,
-                        "Priority": priority_setting,
-                        "Alpha": alpha_val,
-                        "Beta": beta_val,
-                        "AvgTime_ms": avg_time_ms,
-                        "SuccessfulRuns": len(cycle_times_ms)
-                    })
-                    log_info(f"  Avg time for Alpha={alpha_val}, Beta={beta_val} ({len(cycle_times_ms)}/{DEFAULT_CYCLES} runs): {avg_time_ms:.2f} ms")
-                else:
-                    log_warn(f"  All runs failed for Alpha={alpha_val}, Beta={beta_val}, Prio={priority_setting}. No data recorded for this point.")
-        
-        # Save results and generate heatmap for the current priority setting
-        if current_tuning_results:
-            df = pd.DataFrame(current_tuning_results)
-            csv_filename = f"param_tuning_{priority_str}_m{FIXED_MATRIX_SIZE}_t{FIXED_THREADS}.csv"
-            csv_path = os.path.join(results_basedir, csv_filename)
-            df.to_csv(csv_path, index=False)
+        csv_filename = f"param_tuning_{priority_str}_m{FIXED_MATRIX_SIZE}_t{FIXED_THREADS}.csv"
+        csv_path = os.path.join(results_basedir, csv_filename)
+
+        # One task per valid (alpha, beta) pair
+        tasks = [{"label": f"Config {idx}/{len(valid_pairs)} ({priority_str}): Alpha={alpha_val}, Beta={beta_val}",
+                  "source": main_cpp_file, "matrix": matrix_file_path, "cycles": DEFAULT_CYCLES,
+                  "threads": FIXED_THREADS,
+                  "macros": {"ALPHA": alpha_val, "BETA": beta_val, "USE_PRIORITY_MAIN_QUEUE": priority_setting},
+                  "row": {"MatrixSize": FIXED_MATRIX_SIZE, "Threads": FIXED_THREADS, "Priority": priority_setting,
+                          "Alpha": alpha_val, "Beta": beta_val}}
+                 for idx, (alpha_val, beta_val) in enumerate(valid_pairs, 1)]
+        run_and_record_tasks(tasks, csv_path, jobs)
+
+        # Generate heatmap for the current priority setting
+        df = load_recorded_results(csv_path)
+        if df is not None:
             log_info(f"Parameter tuning results for {priority_str} saved to: {csv_path}")
 
             try:
                 # Create pivot table for heatmap: Alpha on Y-axis, Beta on X-axis
-                df_pivot = df.pivot_table(index='Alpha', columns='Beta', values='AvgTime_ms')
-                
-                plt.figure(figsize=(16, 12)) # Adjusted for better readability of heatmap
-                import seaborn as sns # Ensure seaborn is in Dockerfile
-                
-                sns.heatmap(df_pivot, annot=True, fmt=".1f", cmap="viridis_r", 
-                            linewidths=.5, annot_kws={"size": 8})
-                plt.title(f"Heatmap: Avg Execution Time (ms) - {priority_str.replace('_', ' ')}\nMatrix: {FIXED_MATRIX_SIZE}x{FIXED_MATRIX_SIZE}, Threads: {FIXED_THREADS}", fontsize=14)
+                df_pivot = df.pivot_table(index='Alpha', columns='Beta', values='MinTime_ms')
+                # Annotations are one Text object per cell: fine up to a 16x16 grid, the bulk of the plot time beyond
+                use_annot = _HAS_SNS and df_pivot.size <= 256
+
+                fig, ax = plt.subplots(figsize=(16, 12)) # Adjusted for better readability of heatmap
+                if use_annot:
+                    sns.heatmap(df_pivot, annot=True, fmt=".1f", cmap="viridis_r", 
+                                linewidths=.5, annot_kws={"size": 8}, ax=ax)
+                else:
+                    im = ax.imshow(df_pivot.values, cmap="viridis_r", aspect="auto")
+                    fig.colorbar(im, ax=ax)
+                    ax.set_xticks(range(len(df_pivot.columns)))
+                    ax.set_xticklabels(df_pivot.columns)
+                    ax.set_yticks(range(len(df_pivot.index)))
+                    ax.set_yticklabels(df_pivot.index)
+                plt.title(f"Heatmap: Min Execution Time (ms) - {priority_str.replace('_', ' ')}\nMatrix: {FIXED_MATRIX_SIZE}x{FIXED_MATRIX_SIZE}, Threads: {FIXED_THREADS}", fontsize=14)
                 plt.xlabel("Beta Value", fontsize=12)
                 plt.ylabel("Alpha Value", fontsize=12)
                 plt.xticks(rotation=45, ha='right')
@@ -269,16 +582,12 @@ def run_param_tuning_benchmark(results_basedir):
                 plt.savefig(plot_path, dpi=150)
                 plt.close()
                 log_info(f"Heatmap saved to: {plot_path}")
-
-                # Find and print optimal for this priority setting
-                if not df.empty:
-                    optimal_row = df.loc[df['AvgTime_ms'].idxmin()]
-                    log_info(f"[OPTIMAL for {priority_str.upper()}] Alpha: {optimal_row['Alpha']}, Beta: {optimal_row['Beta']}, AvgTime: {optimal_row['AvgTime_ms']:.2f} ms")
-
-            except ImportError:
-                log_warn("Seaborn library not found. Skipping heatmap generation.")
             except Exception as e:
                 log_warn(f"Could not generate heatmap plot for {priority_str}: {e}")
+
+            # Find and print optimal for this priority setting (also without a heatmap)
+            optimal_row = df.loc[df['MinTime_ms'].idxmin()]
+            log_info(f"[OPTIMAL for {priority_str.upper()}] Alpha: {optimal_row['Alpha']}, Beta: {optimal_row['Beta']}, MinTime: {optimal_row['MinTime_ms']:.2f} ms")
         else:
             log_warn(f"No results collected for parameter tuning ({priority_str}).")
             
@@ -286,7 +595,7 @@ def run_param_tuning_benchmark(results_basedir):
 
 
 # Experiment 2: Scalability (Fig 4a, 4b)
-def run_scalability_benchmark(results_basedir):
+def run_scalability_benchmark(results_basedir, jobs=1):
     log_info("===== Starting Scalability Benchmark (Experiment 2 - Fig 4a, 4b) =====")
     matrix_sizes = [300, 2400, 4800, 7200, 10800]
     fixed_threads_list = [26, 52]
@@ -296,45 +605,25 @@ def run_scalability_benchmark(results_basedir):
     optimal_ab_barrier = {"alpha": 16, "beta": 16, "prio": None, "source": "barrier_main.cpp", "label": "Barrier"}
     
     configs_to_run = [optimal_ab_no_prio, optimal_ab_with_prio, optimal_ab_barrier]
-    all_results = []
+    csv_path = os.path.join(results_basedir, "scalability_results.csv")
 
+    tasks = []
     for threads in fixed_threads_list:
-        log_info(f"--- Running for {threads} THREADS ---")
         for m_size in matrix_sizes:
-            log_info(f"  Matrix Size: {m_size}x{m_size}")
             matrix_file_path = os.path.join(TESTCASE_DIR, f"matrix_{m_size}x{m_size}.txt")
             generate_matrix_if_needed(m_size, m_size, matrix_file_path)
 
             for config in configs_to_run:
-                log_info(f"    Config: {config['label']}")
-                update_makefile(config['source'])
-                update_cpp_macro(config['source'], "NUM_THREADS", threads)
-                update_cpp_macro(config['source'], "ALPHA", config['alpha'])
-                update_cpp_macro(config['source'], "BETA", config['beta'])
-                if config['prio'] is not None:
-                    update_cpp_macro(config['source'], "USE_PRIORITY_MAIN_QUEUE", config['prio'])
-                compile_code()
-
-                cycle_times_ms = []
-                for cycle in range(DEFAULT_CYCLES):
-                    log_info(f"      Run {cycle+1}/{DEFAULT_CYCLES}")
-                    exec_time = run_executable(matrix_file_path, DEFAULT_TIME_REGEX)
-                    if exec_time is not None:
-                        cycle_times_ms.append(exec_time)
-                
-                if cycle_times_ms:
-                    avg_time = np.mean(cycle_times_ms)
-                    all_results.append({
-                        "Method": config['label'], "MatrixSize": m_size, 
-                        "Threads": threads, "AvgTime_ms": avg_time
-                    })
-                    log_info(f"      Avg time: {avg_time:.2f} ms")
-    
-    if all_results:
-        df = pd.DataFrame(all_results)
-        df["AvgTime_s"] = df["AvgTime_ms"] / 1000.0
-        csv_path = os.path.join(results_basedir, "scalability_results.csv")
-        df.to_csv(csv_path, index=False)
+                tasks.append({"label": f"{threads} threads, Matrix Size: {m_size}x{m_size}, Config: {config['label']}",
+                              "source": config['source'], "matrix": matrix_file_path, "cycles": DEFAULT_CYCLES,
+                              "threads": threads,
+                              "macros": {"ALPHA": config['alpha'], "BETA": config['beta'], "USE_PRIORITY_MAIN_QUEUE": config['prio']},
+                              "row": {"Method": config['label'], "MatrixSize": m_size, "Threads": threads}})
+
+    run_and_record_tasks(tasks, csv_path, jobs, with_seconds=True)
+
+    df = load_recorded_results(csv_path)
+    if df is not None:
         log_info(f"Scalability results saved to {csv_path}")
 
         # Plotting Fig 4a and 4b
@@ -344,7 +633,7 @@ def run_scalability_benchmark(results_basedir):
             plt.figure(figsize=(10, 6))
             markers = {'Barrier': '^', 'Without Priority': 'o', 'With Priority': 's'}
             for method_name, group_data in df_plot.groupby("Method"):
-                plt.plot(group_data["MatrixSize"], group_data["AvgTime_s"], marker=markers.get(method_name, 'x'), label=method_name)
+                plt.plot(group_data["MatrixSize"], group_data["MinTime_s"], marker=markers.get(method_name, 'x'), label=method_name)
             plt.xlabel("Matrix Size")
             plt.ylabel("Execution Time (s)")
             fig_label = 'a' if threads_to_plot == 26 else 'b'
@@ -361,7 +650,7 @@ def run_scalability_benchmark(results_basedir):
 
 
 # Experiment 3: Throughput (Fig 5)
-def run_throughput_benchmark(results_basedir):
+def run_throughput_benchmark(results_basedir, jobs=1):
     log_info("===== Starting Throughput Benchmark (Experiment 3 - Fig 5) =====")
     fixed_m_size = 8192 
     thread_points_for_plot = [4, 24, 44, 64, 84, 100]
@@ -373,43 +662,21 @@ def run_throughput_benchmark(results_basedir):
     optimal_ab_barrier = {"alpha": 12, "beta": 12, "prio": None, "source": "barrier_main.cpp", "label": "Barrier"}
     configs_to_run = [optimal_ab_no_prio, optimal_ab_with_prio, optimal_ab_barrier]
     
-    all_results = []
+    csv_path = os.path.join(results_basedir, "throughput_results.csv")
     matrix_file_path = os.path.join(TESTCASE_DIR, f"matrix_{fixed_m_size}x{fixed_m_size}.txt")
     generate_matrix_if_needed(fixed_m_size, fixed_m_size, matrix_file_path)
 
-    for config in configs_to_run:
-        log_info(f"--- Running for Config: {config['label']} ---")
-        update_makefile(config['source'])
-        update_cpp_macro(config['source'], "ALPHA", config['alpha'])
-        update_cpp_macro(config['source'], "BETA", config['beta'])
-        if config['prio'] is not None:
-            update_cpp_macro(config['source'], "USE_PRIORITY_MAIN_QUEUE", config['prio'])
-
-        for threads in threads_to_run_data_for:
-            log_info(f"  Threads: {threads}")
-            update_cpp_macro(config['source'], "NUM_THREADS", threads)
-            compile_code() # Recompile if NUM_THREADS changed
-
-            cycle_times_ms = []
-            for cycle in range(DEFAULT_CYCLES):
-                log_info(f"    Run {cycle+1}/{DEFAULT_CYCLES}")
-                exec_time = run_executable(matrix_file_path, DEFAULT_TIME_REGEX)
-                if exec_time is not None:
-                    cycle_times_ms.append(exec_time)
-            
-            if cycle_times_ms:
-                avg_time = np.mean(cycle_times_ms)
-                all_results.append({
-                    "Method": config['label'], "Threads": threads, 
-                    "MatrixSize": fixed_m_size, "AvgTime_ms": avg_time
-                })
-                log_info(f"    Avg time: {avg_time:.2f} ms")
-
-    if all_results:
-        df = pd.DataFrame(all_results)
-        df["AvgTime_s"] = df["AvgTime_ms"] / 1000.0
-        csv_path = os.path.join(results_basedir, "throughput_results.csv")
-        df.to_csv(csv_path, index=False)
+    tasks = [{"label": f"Config: {config['label']}, Threads: {threads}",
+              "source": config['source'], "matrix": matrix_file_path, "cycles": DEFAULT_CYCLES,
+              "threads": threads,
+              "macros": {"ALPHA": config['alpha'], "BETA": config['beta'], "USE_PRIORITY_MAIN_QUEUE": config['prio']},
+              "row": {"Method": config['label'], "Threads": threads, "MatrixSize": fixed_m_size}}
+             for config in configs_to_run for threads in threads_to_run_data_for]
+
+    run_and_record_tasks(tasks, csv_path, jobs, with_seconds=True)
+
+    df = load_recorded_results(csv_path)
+    if df is not None:
         log_info(f"Throughput results saved to {csv_path}")
 
         # Plotting Fig 5
@@ -418,7 +685,7 @@ def run_throughput_benchmark(results_basedir):
         df_plot_fig5 = df[df["Threads"].isin(thread_points_for_plot)] # Filter for plot points
 
         for method_name, group_data in df_plot_fig5.groupby("Method"):
-            plt.plot(group_data["Threads"], group_data["AvgTime_s"], marker=markers.get(method_name, 'x'), label=method_name)
+            plt.plot(group_data["Threads"], group_data["MinTime_s"], marker=markers.get(method_name, 'x'), label=method_name)
         
         plt.xlabel("Thread Count")
         plt.ylabel("Execution Time (s)")
@@ -439,19 +706,41 @@ def run_throughput_benchmark(results_basedir):
 
 # --- Main Entry Point ---
 def main():
+    global DROP_CACHES, ASCII_INPUT
     parser = argparse.ArgumentParser(description="Master experiment runner for ParQR artifact.")
     parser.add_argument("--config", type=str, help="Path to a JSON configuration file for a single run (e.g., minimal test).")
     parser.add_argument("--experiment", type=str, 
                         choices=["param_tuning", "scalability", "throughput", "all_required", "all"], 
                         help="Run a predefined benchmark experiment or all.")
+    parser.add_argument("--jobs", type=str, default="1",
+                        help="Benchmark points to run in parallel, each in its own source-tree copy pinned to its own CPUs "
+                             "(an integer, or 'auto' to fit as many as the CPUs allow). Default: 1, everything in sequence.")
+    parser.add_argument("--drop-caches", action="store_true",
+                        help="Drop the OS page cache before every cycle to measure cold-cache (I/O included) times. "
+                             "Needs root and a writable /proc/sys/vm/drop_caches; parallel workers would drop each other's caches.")
+    parser.add_argument("--ascii", action="store_true",
+                        help="Run a.out on the text matrix files instead of their binary .npy copies (slower to load; "
+                             "for builds that cannot read .npy).")
     
     args = parser.parse_args()
+    if args.jobs != "auto" and not args.jobs.isdigit():
+        parser.error(f"--jobs must be a positive integer or 'auto', not '{args.jobs}'")
+    if args.drop_caches:
+        try:
+            drop_page_caches()
+        except OSError as e:
+            log_error(f"--drop-caches needs write access to /proc/sys/vm/drop_caches: {e}"); sys.exit(1)
+        DROP_CACHES = True
+    ASCII_INPUT = args.ascii
 
     log_info(f"Master runner script CWD: {os.getcwd()}")
     # Basic check for Makefile
     if not os.path.exists(MAKEFILE_NAME):
         log_error(f"Makefile '{MAKEFILE_NAME}' not found in CWD. Ensure Docker -w flag is correct.")
         sys.exit(1)
+    if parqr_build is None:
+        log_error("scripts/parqr_build.py not found in CWD. Ensure Docker -w flag points at the ParQR tree.")
+        sys.exit(1)
     
     # Create base results directory
     os.makedirs(RESULTS_DIR, exist_ok=True)
@@ -466,10 +755,10 @@ def main():
         except json.JSONDecodeError:
             log_error(f"Error decoding JSON: {args.config}"); sys.exit(1)
         
-        avg_time = run_single_config_from_dict(config_data, DEFAULT_TIME_REGEX)
-        if avg_time is not None:
-            log_info(f"Minimal test '{config_data.get('test_description')}' completed. Avg time: {avg_time:.2f} ms")
-            print(f"MINIMAL_TEST_PASSED: Average time {avg_time:.2f} ms")
+        min_time = run_single_config_from_dict(config_data, DEFAULT_TIME_REGEX)
+        if min_time is not None:
+            log_info(f"Minimal test '{config_data.get('test_description')}' completed. Min time: {min_time:.2f} ms")
+            print(f"MINIMAL_TEST_PASSED: Min time {min_time:.2f} ms")
         else:
             log_error(f"Minimal test '{config_data.get('test_description')}' FAILED.")
             print("MINIMAL_TEST_FAILED")
@@ -477,11 +766,11 @@ def main():
 
     elif args.experiment:
         if args.experiment == "param_tuning" or args.experiment == "all":
-            run_param_tuning_benchmark(RESULTS_DIR)
+            run_param_tuning_benchmark(RESULTS_DIR, args.jobs)
         if args.experiment == "scalability" or args.experiment == "all_required" or args.experiment == "all":
-            run_scalability_benchmark(RESULTS_DIR)
+            run_scalability_benchmark(RESULTS_DIR, args.jobs)
         if args.experiment == "throughput" or args.experiment == "all_required" or args.experiment == "all":
-            run_throughput_benchmark(RESULTS_DIR)
+            run_throughput_benchmark(RESULTS_DIR, args.jobs)
         log_info(f"Benchmark experiment(s) '{args.experiment}' finished.")
         container_results_path = os.path.abspath(RESULTS_DIR)
         log_info(f"All results for this run were saved inside the container at: {container_results_path}")
@@ -493,10 +782,6 @@ def main():
         parser.print_help()
 
 if __name__ == "__main__":
-    # Ensure seaborn is available if plotting heatmaps directly
-    try:
-        import seaborn
-    except ImportError:
-        log_warn("Seaborn not installed, heatmap for parameter tuning might not be generated by this script.")
-        pass # Continue without it, plotting will try/except
+    if not _HAS_SNS:
+        log_warn("Seaborn not installed, the parameter-tuning heatmap will be drawn without value annotations.")
     main()